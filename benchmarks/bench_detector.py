@@ -0,0 +1,71 @@
+'''
+Throughput benchmark for the YOLO detector on CPU: images/sec for the
+original one-model-per-call detect_objects, a reused ObjectDetector, and
+batched inference, over the images in sample-images/.
+
+Usage: python benchmarks/bench_detector.py [--threads 4] [--batch-size 8] [--rounds 3]
+'''
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+import cv2
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(PROJECT_ROOT, "camera"))
+
+from ultralytics import YOLO
+from trial_object_detection import ObjectDetector
+
+
+def images_per_second(run, frames, rounds: int) -> float:
+    run(frames[:1])  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        run(frames)
+    return rounds * len(frames) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark YOLO detector throughput on CPU")
+    parser.add_argument("--images", default=os.path.join(PROJECT_ROOT, "sample-images"))
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    frames = [cv2.imread(str(p)) for p in paths]
+    detector = ObjectDetector(args.model, num_threads=args.threads)
+
+    def reload_per_call(batch):
+        # What detect_objects used to do: construct the model for every image
+        for frame in batch:
+            YOLO(args.model)(frame, verbose=False)
+
+    def reused_single(batch):
+        for frame in batch:
+            detector.detect(frame, annotate=False)
+
+    def reused_batched(batch):
+        detector.detect_batch(batch, annotate=False, batch_size=args.batch_size)
+
+    def reused_batched_annotated(batch):
+        detector.detect_batch(batch, annotate=True, batch_size=args.batch_size)
+
+    print(f"{len(frames)} images, threads={args.threads or 'default'}, batch size={args.batch_size}")
+    for name, run in [
+        ("model per call", reload_per_call),
+        ("reused model", reused_single),
+        ("batched", reused_batched),
+        ("batched + annotate", reused_batched_annotated),
+    ]:
+        print(f"{name:<22}{images_per_second(run, frames, args.rounds):>8.2f} images/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+'''
+Micro-benchmark for image encoding: compares the original resize-to-1000x1000
+encoder against report/image_encoding.py for file paths, JPEG bytes and
+in-memory frames over every image in sample-images/.
+
+Usage: python benchmarks/bench_encode_image.py [--max-side 1000] [--quality 85] [--repeat 10]
+'''
+
+import os
+import io
+import sys
+import time
+import base64
+import argparse
+from pathlib import Path
+import cv2
+from PIL import Image
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(PROJECT_ROOT, "report"))
+
+from image_encoding import encode_image_base64
+
+
+def legacy_encode(image_path: str) -> str:
+    """The encoder TrashAnalyzer used before the fast path, kept for comparison."""
+    img = Image.open(image_path)
+    image = img.resize((1000, 1000))
+    with io.BytesIO() as output:
+        image.save(output, format="JPEG")
+        return base64.b64encode(output.getvalue()).decode('utf-8')
+
+
+def time_encoder(encode, source, repeat: int) -> tuple:
+    """Return (mean milliseconds per call, encoded payload bytes)."""
+    encoded = encode(source)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode(source)
+    elapsed = time.perf_counter() - start
+    return elapsed / repeat * 1000, len(encoded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image encoding for the vision model")
+    parser.add_argument("--images", default=os.path.join(PROJECT_ROOT, "sample-images"))
+    parser.add_argument("--max-side", type=int, default=1000)
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    def fast(source):
+        return encode_image_base64(source, max_side=args.max_side, quality=args.quality)
+
+    paths = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    print(f"{'image':<22}{'source':<8}{'encoder':<8}{'ms':>10}{'bytes':>12}")
+
+    for path in paths:
+        with open(path, "rb") as f:
+            raw = f.read()
+        frame = cv2.imread(str(path))
+
+        rows = [
+            ("path", "legacy", legacy_encode, str(path)),
+            ("path", "fast", fast, str(path)),
+            ("bytes", "fast", fast, raw),
+            ("frame", "fast", fast, frame),
+        ]
+        for source_name, encoder_name, encode, source in rows:
+            try:
+                ms, size = time_encoder(encode, source, args.repeat)
+            except OSError as e:
+                # The legacy encoder cannot save RGBA PNGs as JPEG
+                print(f"{path.name:<22}{source_name:<8}{encoder_name:<8}  failed: {str(e)}")
+                continue
+            print(f"{path.name:<22}{source_name:<8}{encoder_name:<8}{ms:>10.2f}{size:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+'''
+Offline end-to-end benchmark of TrashAnalyzer.analyze_trash: latency
+percentiles and frames/sec at several concurrency levels, with the OpenAI
+and Perplexity APIs replaced by a local stub server.
+
+The stub answers every chat-completions request the pipeline makes (vision,
+emissions lookups and parses, recommendations) with plausible JSON after a
+configurable latency +/- jitter, and fails a configurable fraction of
+requests with HTTP 500. Each frame compares the baseline image against one
+of the other images in sample-images/.
+
+Usage: python benchmarks/bench_pipeline.py [--concurrency 1 2 4 8] [--frames 16]
+       [--latency 0.5] [--jitter 0.2] [--error-rate 0.0] [--rate 5] [--hedge-after 1.0] [--cache]
+'''
+
+import os
+import sys
+import io
+import json
+import time
+import random
+import argparse
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(PROJECT_ROOT, "report"))
+
+from basic_pipeline import TrashAnalyzer
+from cache import LRUCache
+from rate_limiter import AsyncRateLimiter
+from resilience import ResilientCaller
+
+STUB_ITEMS = [
+    ("plastic bottle", 0.03, "recycle"),
+    ("aluminum can", 0.015, "recycle"),
+    ("banana peel", 0.1, "compost"),
+    ("coffee cup", 0.02, "trash"),
+    ("paper napkin", 0.005, "compost"),
+    ("chip bag", 0.01, "trash"),
+]
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """Emulates POST /v1/chat/completions (OpenAI) and /chat/completions (Perplexity)."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client cancelled the request (e.g. the losing half of a hedged pair)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        config = self.server.config
+        time.sleep(max(0.0, config["latency"] + random.uniform(-config["jitter"], config["jitter"])))
+        with self.server.lock:
+            self.server.requests += 1
+
+        if random.random() < config["error_rate"]:
+            with self.server.lock:
+                self.server.errors += 1
+            self._send_json(500, {"error": {"message": "stub server error", "type": "server_error"}})
+            return
+
+        self._send_json(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(stub_content(request))},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+
+def stub_content(request: dict) -> dict:
+    """Pick a response shape from the schema or prompt the pipeline sent."""
+    messages = request.get("messages", [])
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    user = next((m["content"] for m in messages if m["role"] == "user"), "")
+    response_format = request.get("response_format") or {}
+    schema = response_format.get("json_schema", {}).get("schema", {})
+    properties = schema.get("properties", {})
+
+    if "trash" in properties:
+        return {"trash": "Stub trash advice.", "compost": "Stub compost advice.", "recycle": "Stub recycle advice."}
+    if "items" in properties or "'items'" in system:
+        # Batch lookup lists one "- name" per line; a parse request gets arbitrary prose
+        names = [line[2:] for line in str(user).splitlines() if line.startswith("- ")] or ["item"]
+        return {"items": [{"name": name, "emissions_per_kg": round(random.uniform(0.1, 3.0), 3)} for name in names]}
+    if "emissions_per_kg" in properties or "emissions_per_kg" in system:
+        return {"emissions_per_kg": round(random.uniform(0.1, 3.0), 3)}
+
+    # Vision request
+    items = random.sample(STUB_ITEMS, random.randint(1, 4))
+    return {"items": [{"name": name, "mass_kg": mass, "proper_category": category} for name, mass, category in items]}
+
+
+def start_stub_server(latency: float, jitter: float, error_rate: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPIHandler)
+    server.daemon_threads = True
+    server.config = {"latency": latency, "jitter": jitter, "error_rate": error_rate}
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.errors = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_level(analyzer: TrashAnalyzer, pairs, concurrency: int, frames: int, verbose: bool) -> dict:
+    latencies = []
+    failures = 0
+
+    def analyze(index: int) -> float:
+        before, after = pairs[index % len(pairs)]
+        start = time.perf_counter()
+        analyzer.analyze_trash(before, after)
+        return time.perf_counter() - start
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(analyze, i) for i in range(frames)]
+            for future in futures:
+                try:
+                    latencies.append(future.result())
+                except Exception:
+                    failures += 1
+        elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (float("nan"),) * 3
+    return {"p50": p50, "p95": p95, "p99": p99, "fps": len(latencies) / elapsed, "failures": failures}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analyze_trash against local API stand-ins")
+    parser.add_argument("--images", default=os.path.join(PROJECT_ROOT, "sample-images"))
+    parser.add_argument("--baseline", default="notrash.jpg", help="Baseline image name inside --images")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--frames", type=int, default=16, help="Frames analyzed per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean stub response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub requests answered with HTTP 500")
+    parser.add_argument("--rate", type=float, default=5.0, help="Rate limiter requests/sec (production default: 5)")
+    parser.add_argument("--hedge-after", type=float, default=None,
+                        help="Send a hedged duplicate of async API calls slower than this many seconds")
+    parser.add_argument("--cache", action="store_true", help="Keep the vision, emissions and recommendations caches and the bundled emissions factors enabled")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args()
+
+    images = Path(args.images)
+    baseline = str(images / args.baseline)
+    pairs = [(baseline, str(p)) for p in sorted(images.iterdir())
+             if p.suffix.lower() in (".jpg", ".jpeg", ".png") and p.name != args.baseline]
+
+    server = start_stub_server(args.latency, args.jitter, args.error_rate)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    analyzer = TrashAnalyzer(
+        "stub-key", "stub-key",
+        # A zero-entry cache stores nothing, so every frame pays for its lookups
+        emissions_cache=None if args.cache else LRUCache(max_entries=0),
+        rate_limiter=AsyncRateLimiter(rate_per_second=args.rate, burst=max(10, int(args.rate * 2)), max_concurrency=8),
+        notify_hardware=False,
+        cache_vision=args.cache,
+        use_local_factors=args.cache,
+        openai_base_url=f"{base_url}/v1",
+        perplexity_url=f"{base_url}/chat/completions",
+        openai_resilience=ResilientCaller("openai", timeout=60.0, hedge_after=args.hedge_after),
+        perplexity_resilience=ResilientCaller("perplexity", timeout=30.0, hedge_after=args.hedge_after)
+    )
+    if not args.cache:
+        analyzer.recommendations_cache = LRUCache(max_entries=0)
+
+    print(f"{len(pairs)} image pairs, {args.frames} frames per level, stub latency {args.latency}s +/- {args.jitter}s, "
+          f"error rate {args.error_rate:.0%}, rate limit {args.rate}/s, caches {'on' if args.cache else 'off'}")
+    print(f"{'concurrency':>11}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'frames/s':>10}{'failed':>8}")
+    try:
+        for concurrency in args.concurrency:
+            result = run_level(analyzer, pairs, concurrency, args.frames, args.verbose)
+            print(f"{concurrency:>11}{result['p50']:>9.2f}{result['p95']:>9.2f}{result['p99']:>9.2f}"
+                  f"{result['fps']:>10.2f}{result['failures']:>8}")
+    finally:
+        analyzer.close()
+        server.shutdown()
+    print(f"Stub server: {server.requests} requests, {server.errors} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,31 @@
+import os
+import sys
+import argparse
 from pathlib import Path
+from typing import Optional
 import cv2
 import time
 import depthai as dai
 import numpy as np
 
-def capture_photos(save_path: str = "captured_photos"):
+# Make report/ importable for the shared perceptual hash
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(PROJECT_ROOT, "report"))
+
+from perceptual_hash import DuplicateFrameFilter
+
+def capture_photos(save_path: str = "captured_photos", interval: Optional[float] = None,
+                   dedupe_distance: Optional[int] = None):
     """
     Capture photos from OAK-D camera and save them to the specified directory.
     
     Args:
         save_path (str): Directory where photos will be saved
+        interval (float): Also capture automatically every interval seconds
+        dedupe_distance (int): Skip frames within this many perceptual-hash bits
+                               of the last saved frame and unchanged by a pixel
+                               diff (None saves every capture)
     """
     # Ensure save directory exists
     Path(save_path).mkdir(parents=True, exist_ok=True)
@@ -42,7 +58,9 @@ def capture_photos(save_path: str = "captured_photos"):
 
         print("Camera ready! Press 'c' to capture, 'q' to quit")
         
+        frame_filter = DuplicateFrameFilter(dedupe_distance) if dedupe_distance is not None else None
         frame_count = 0
+        last_capture = time.monotonic()
         while True:
             inRgb = qRgb.get()
 
@@ -56,7 +74,11 @@ def capture_photos(save_path: str = "captured_photos"):
             key = cv2.waitKey(1)
             if key == ord('q'):
                 break
-            elif key == ord('c'):
+            elif key == ord('c') or (interval is not None and time.monotonic() - last_capture >= interval):
+                last_capture = time.monotonic()
+                if frame_filter is not None and not frame_filter.is_new(frame):
+                    continue
+
                 # Save RGB image
                 timestamp = time.strftime("%Y%m%d_%H%M%S")
                 rgb_filename = f"{save_path}/rgb_{timestamp}_{frame_count}.jpg"
@@ -66,7 +88,15 @@ def capture_photos(save_path: str = "captured_photos"):
                 print(f"Saved image: \n{rgb_filename}")
                 frame_count += 1
 
+        if frame_filter is not None:
+            print(f"Saved {frame_filter.kept} frames, skipped {frame_filter.skipped} near-duplicates")
         cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    capture_photos()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Capture photos from the OAK-D camera")
+    parser.add_argument("--save-path", default="captured_photos")
+    parser.add_argument("--interval", type=float, default=None, help="Also capture every N seconds")
+    parser.add_argument("--dedupe-distance", type=int, default=None,
+                        help="Skip frames within this many perceptual-hash bits of the last saved one")
+    args = parser.parse_args()
+    capture_photos(args.save_path, interval=args.interval, dedupe_distance=args.dedupe_distance)
\ No newline at end of file
@@ -1,62 +1,110 @@
+from typing import List, Optional
 from ultralytics import YOLO
 import cv2
 import numpy as np
 
-def detect_objects(image_path, confidence_threshold=0.05):
+class ObjectDetector:
+    def __init__(self, model_path: str = 'yolov8n.pt', num_threads: Optional[int] = None, device: str = 'cpu'):
+        """
+        Long-lived YOLOv8 detector that loads the model once and reuses it for every call
+        
+        Args:
+            model_path (str): YOLO weights; 'yolov8n.pt' is the nano model, use 's', 'm', 'l', or 'x' for larger models
+            num_threads (int): Number of CPU threads torch may use for inference (None keeps the torch default)
+            device (str): Inference device, e.g. 'cpu' or 'cuda:0'
+        """
+        if num_threads is not None:
+            import torch
+            torch.set_num_threads(num_threads)
+        self.model = YOLO(model_path)
+        self.device = device
+
+    def _read(self, image):
+        image = image if isinstance(image, np.ndarray) else cv2.imread(image)
+        if image is None:
+            raise ValueError("Could not read the image")
+        return image
+
+    def _process(self, image, results, annotate):
+        """Convert one YOLO result into (annotated_image or None, detections)"""
+        boxes = results.boxes
+        xyxy = boxes.xyxy.cpu().numpy().astype(int)
+        confidences = boxes.conf.cpu().numpy()
+        class_ids = boxes.cls.cpu().numpy().astype(int)
+        
+        detections = [
+            {
+                'class': results.names[class_id],
+                'confidence': float(confidence),
+                'bbox': tuple(int(v) for v in box)
+            }
+            for box, confidence, class_id in zip(xyxy, confidences, class_ids)
+        ]
+        
+        if not annotate:
+            return None, detections
+        
+        annotated_image = image.copy()
+        for det in detections:
+            x1, y1, x2, y2 = det['bbox']
+            # Draw bounding box
+            cv2.rectangle(annotated_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            
+            # Add label
+            label = f"{det['class']}: {det['confidence']:.2f}"
+            cv2.putText(annotated_image, label, (x1, y1 - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        
+        return annotated_image, detections
+
+    def detect_batch(self, images: List, confidence_threshold: float = 0.05, annotate: bool = False, batch_size: int = 8) -> List[tuple]:
+        """
+        Perform object detection on several images, running inference in batches
+        
+        Args:
+            images (list): Image paths and/or BGR frames
+            confidence_threshold (float): Minimum confidence score for detections
+            annotate (bool): Whether to draw boxes and labels on a copy of each image
+            batch_size (int): Number of images per inference batch
+            
+        Returns:
+            list: (annotated_image or None, detections) per input image
+        """
+        frames = [self._read(image) for image in images]
+        outputs = []
+        for i in range(0, len(frames), batch_size):
+            batch = frames[i:i + batch_size]
+            # Filtering by confidence inside the model skips low-scoring boxes in NMS
+            results = self.model(batch, conf=confidence_threshold, device=self.device, verbose=False)
+            outputs.extend(self._process(frame, result, annotate) for frame, result in zip(batch, results))
+        return outputs
+
+    def detect(self, image, confidence_threshold: float = 0.05, annotate: bool = True) -> tuple:
+        """Perform object detection on a single image; see detect_batch"""
+        return self.detect_batch([image], confidence_threshold=confidence_threshold, annotate=annotate)[0]
+
+_default_detector = None
+
+def get_detector() -> ObjectDetector:
+    """Return the shared detector, loading the model on first use"""
+    global _default_detector
+    if _default_detector is None:
+        _default_detector = ObjectDetector()
+    return _default_detector
+
+def detect_objects(image_path, confidence_threshold=0.05, annotate=True):
     """
     Perform object detection on an image using YOLOv8
     
     Args:
-        image_path (str): Path to the input image
+        image_path (str or np.ndarray): Path to the input image, or an already loaded BGR frame
         confidence_threshold (float): Minimum confidence score for detections
+        annotate (bool): Whether to draw the detections; annotated_image is None when False
         
     Returns:
         tuple: (annotated_image, detections)
     """
-    # Load the pretrained model
-    model = YOLO('yolov8n.pt')  # Uses the nano model, can be changed to 's', 'm', 'l', or 'x' for larger models
-    
-    # Read the image
-    image = cv2.imread(image_path)
-    if image is None:
-        raise ValueError("Could not read the image")
-    
-    # Run inference
-    results = model(image)[0]
-    
-    # Process and visualize detections
-    annotated_image = image.copy()
-    detections = []
-    
-    for box in results.boxes:
-        # Get box coordinates
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        
-        # Get confidence and class
-        confidence = float(box.conf[0])
-        class_id = int(box.cls[0])
-        class_name = results.names[class_id]
-        
-        # Filter by confidence
-        if confidence < confidence_threshold:
-            continue
-            
-        # Add detection to list
-        detections.append({
-            'class': class_name,
-            'confidence': confidence,
-            'bbox': (x1, y1, x2, y2)
-        })
-        
-        # Draw bounding box
-        cv2.rectangle(annotated_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        
-        # Add label
-        label = f'{class_name}: {confidence:.2f}'
-        cv2.putText(annotated_image, label, (x1, y1 - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-    
-    return annotated_image, detections
+    return get_detector().detect(image_path, confidence_threshold=confidence_threshold, annotate=annotate)
 
 def save_results(image, output_path):
     """Save the annotated image"""
@@ -1,17 +1,24 @@
-import serial
-import time
+import os
+import sys
+import atexit
 
-ser = serial.Serial('/dev/tty.usbmodem1101', 115200, timeout=1)
+# Make report/ importable for the shared serial notifier
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(PROJECT_ROOT, "report"))
 
-def show_correct():
-    ser.write(f"correct\n".encode())
-    print(f"Sent command: correct")
+from serial_notifier import SerialNotifier
 
-def show_incorrect():
-    ser.write(f"incorrect\n".encode())
-    print(f"Sent command: incorrect")
+# Port comes from $SERIAL_PORT (default /dev/tty.usbmodem1101); opened on first command
+notifier = SerialNotifier()
+# Commands are written by a daemon thread; wait for them before the interpreter exits
+atexit.register(notifier.close)
 
-show_correct()
-ser.close()
+def show_correct():
+    notifier.send("correct")
 
+def show_incorrect():
+    notifier.send("incorrect")
 
+if __name__ == "__main__":
+    show_correct()
@@ -3,6 +3,9 @@ import json
 from typing import Tuple, Optional
 import cv2
 import time
+import threading
+from collections import deque
+import numpy as np
 import depthai as dai
 from pathlib import Path
 import sys
@@ -13,15 +16,34 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 sys.path.append(PROJECT_ROOT)
 
 from basic_pipeline import TrashAnalyzer
+from perceptual_hash import DuplicateFrameFilter
 from report import ReportData
 from dotenv import load_dotenv
 
 class CameraCapture:
-    def __init__(self, save_path: str = "captured_photos"):
-        """Initialize camera capture with save directory."""
+    def __init__(self, save_path: str = "captured_photos", buffer_size: int = 4, reconnect_delay: float = 1.0,
+                 dedupe_distance: Optional[int] = None):
+        """Initialize camera capture with save directory.
+
+        The OAK device is opened once and kept open; a background thread drains
+        the "rgb" queue into a small ring buffer of the most recent frames and
+        reopens the device if it drops.
+
+        With dedupe_distance set, capture_image() returns the previous file
+        instead of writing a frame whose perceptual hash is within
+        dedupe_distance bits of the last one written and whose pixels are
+        unchanged.
+        """
         self.save_path = save_path
         Path(save_path).mkdir(parents=True, exist_ok=True)
         self.pipeline = self._create_pipeline()
+        self.reconnect_delay = reconnect_delay
+        self._frames = deque(maxlen=buffer_size)  # (timestamp, frame), newest last
+        self._frame_ready = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.frame_filter = DuplicateFrameFilter(dedupe_distance) if dedupe_distance is not None else None
+        self._last_saved_path: Optional[str] = None
 
     def _create_pipeline(self) -> dai.Pipeline:
         """Create and configure the camera pipeline."""
@@ -45,22 +67,80 @@ class CameraCapture:
         return pipeline  
          
 
+    def start(self) -> None:
+        """Start the background frame grabber if it is not already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._grab_frames, name="oak-frame-grabber", daemon=True)
+        self._thread.start()
+
+    def _grab_frames(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with dai.Device(self.pipeline) as device:
+                    print("Camera connected")
+                    qRgb = device.getOutputQueue(name="rgb", maxSize=4, blocking=False)
+                    while not self._stop.is_set():
+                        if device.isClosed():
+                            raise RuntimeError("device closed")
+                        inRgb = qRgb.tryGet()
+                        if inRgb is None:
+                            time.sleep(0.005)
+                            continue
+                        with self._frame_ready:
+                            self._frames.append((time.time(), inRgb.getCvFrame()))
+                            self._frame_ready.notify_all()
+            except RuntimeError as e:
+                if self._stop.is_set():
+                    break
+                print(f"Camera disconnected ({str(e)}), reconnecting in {self.reconnect_delay}s")
+                self._stop.wait(self.reconnect_delay)
+
+    def latest_frame(self, timeout: float = 10.0, max_age: float = 2.0) -> Optional[np.ndarray]:
+        """Return the most recent frame, waiting up to timeout seconds if none is newer than max_age.
+
+        max_age keeps a stale frame from before a disconnect from being returned.
+        """
+        self.start()
+
+        def fresh() -> bool:
+            return len(self._frames) > 0 and time.time() - self._frames[-1][0] <= max_age
+
+        with self._frame_ready:
+            if not self._frame_ready.wait_for(fresh, timeout=timeout):
+                return None
+            return self._frames[-1][1]
+
     def capture_image(self) -> Optional[str]:
         """
-        Captures an image from the OAK-D camera instantly and saves it as 'after_TIMESTAMP.jpg'.
+        Saves the latest frame from the OAK-D camera as 'after.jpg'.
+
+        In dedupe mode a near-duplicate of the last saved frame is not written
+        and the path of the last saved frame is returned instead.
         """
-        with dai.Device(self.pipeline) as device:
-            qRgb = device.getOutputQueue(name="rgb", maxSize=4, blocking=False)
-            
-            # Wait for the first available frame
-            inRgb = qRgb.get()
-            frame = inRgb.getCvFrame()
+        frame = self.latest_frame()
+        if frame is None:
+            print("No frame available from camera")
+            return None
 
-            image_path = os.path.join(self.save_path, f"after.jpg")
-            cv2.imwrite(image_path, frame)
+        if self.frame_filter is not None and not self.frame_filter.is_new(frame):
+            print(f"Frame unchanged, keeping {self._last_saved_path}")
+            return self._last_saved_path
 
-            print(f"Saved image: {image_path}")
-            return image_path
+        image_path = os.path.join(self.save_path, f"after.jpg")
+        cv2.imwrite(image_path, frame)
+        self._last_saved_path = image_path
+
+        print(f"Saved image: {image_path}")
+        return image_path
+
+    def close(self) -> None:
+        """Stop the frame grabber and release the device."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
 
 def main():
     # Load environment variables
@@ -78,27 +158,32 @@ def main():
     camera = CameraCapture()
     analyzer = TrashAnalyzer(openai_api_key, perplexity_api_key)
     
-    # Capture images
-    before_path, after_path = camera.capture_before_after()
+    try:
+        # Capture images
+        before_path, after_path = camera.capture_before_after()
     
-    if not before_path or not after_path:
-        print("Image capture cancelled")
-        return
+        if not before_path or not after_path:
+            print("Image capture cancelled")
+            return
     
-    # Analyze the images
-    print("\nAnalyzing images...")
-    report_data = analyzer.analyze_trash(before_path, after_path)
+        # Analyze the images
+        print("\nAnalyzing images...")
+        report_data = analyzer.analyze_trash(before_path, after_path)
     
-    # Print results
-    print("\nAnalysis Results:")
-    print(f"Number of trash items: {report_data.numTrash}")
-    print(f"Number of compost items: {report_data.numCompost}")
-    print(f"Number of recycle items: {report_data.numRecycle}")
-    print(f"Recyclable items: {', '.join(report_data.recycleNames)}")
-    print(f"Compostable items: {', '.join(report_data.compostNames)}")
-    print(f"Trash emissions: {report_data.trashEmissions} kg CO2e")
-    print(f"Recycle emissions: {report_data.recycleInTrashEmissions} kg CO2e")
-    print(f"Compost emissions: {report_data.compostInTrashEmissions} kg CO2e")
+        # Print results
+        print("\nAnalysis Results:")
+        print(f"Number of trash items: {report_data.numTrash}")
+        print(f"Number of compost items: {report_data.numCompost}")
+        print(f"Number of recycle items: {report_data.numRecycle}")
+        print(f"Recyclable items: {', '.join(report_data.recycleNames)}")
+        print(f"Compostable items: {', '.join(report_data.compostNames)}")
+        print(f"Trash emissions: {report_data.trashEmissions} kg CO2e")
+        print(f"Recycle emissions: {report_data.recycleInTrashEmissions} kg CO2e")
+        print(f"Compost emissions: {report_data.compostInTrashEmissions} kg CO2e")
+    finally:
+        # The display command is written by the notifier's thread; close() waits for it
+        analyzer.close()
+        camera.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,120 +1,424 @@
 import os
 import json
-import base64
-from typing import List, Dict
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 import requests
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import asyncio
 import aiohttp
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dotenv import load_dotenv
-from PIL import Image
-import io
 from report import ReportData
+from cache import LRUCache, PersistentLRUCache
+from rate_limiter import AsyncRateLimiter
+from event_loop import BackgroundEventLoop
+from image_encoding import ImageSource
+from change_detection import ChangeDetector, load_grayscale
+from frame_preparation import FramePreparer, init_worker, prepare_in_worker
+from perceptual_hash import PerceptualHashCache
+from resilience import ResilientCaller, ProviderError
+from emission_factors import EmissionFactorTable, normalize_item_name
+from local_classifier import LocalClassifier
+from serial_notifier import SerialNotifier
+from stage_graph import StageGraph
+from metrics import REGISTRY, timed, record_error, record_pipeline
 from pydantic import BaseModel
 import ssl
 import certifi
-import serial
 import time
 
 ssl_context = ssl.create_default_context(cafile=certifi.where())
 
+PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"
+
+DEFAULT_EMISSIONS_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "emissions_factors.json")
+
 class EmissionsResponse(BaseModel):
     emissions_per_kg: float
 
-class TrashAnalyzer:
-    def __init__(self, openai_api_key: str, perplexity_api_key: str):
-        self.openai_client = OpenAI(api_key=openai_api_key)
+class ItemEmissions(BaseModel):
+    name: str
+    emissions_per_kg: float
+
+class BatchEmissionsResponse(BaseModel):
+    items: List[ItemEmissions]
+
+class RecommendationsResponse(BaseModel):
+    trash: str
+    compost: str
+    recycle: str
+
+RECOMMENDATIONS_PROMPT = "Based on the items identified in the trash, compost, and recycling bins, provide recommendations to reduce waste and improve recycling rates. Include suggestions for reducing waste, composting, and recycling more effectively. Please make these recommendations at most 2 sentences."
+
+class TrashAnalyzer(FramePreparer):
+    def __init__(self, openai_api_key: str, perplexity_api_key: str,
+                 emissions_cache: Optional[PersistentLRUCache] = None,
+                 rate_limiter: Optional[AsyncRateLimiter] = None,
+                 batch_emissions: bool = True,
+                 combined_recommendations: bool = True,
+                 image_max_side: int = 1000,
+                 jpeg_quality: int = 85,
+                 change_detector: Optional[ChangeDetector] = None,
+                 send_changed_regions: bool = False,
+                 max_regions: int = 4,
+                 include_overview: bool = True,
+                 local_classifier: Optional[LocalClassifier] = None,
+                 notifier: Optional[SerialNotifier] = None,
+                 notify_hardware: bool = True,
+                 vision_cache: Optional[PerceptualHashCache] = None,
+                 cache_vision: bool = True,
+                 openai_base_url: Optional[str] = None,
+                 perplexity_url: str = PERPLEXITY_URL,
+                 openai_resilience: Optional[ResilientCaller] = None,
+                 perplexity_resilience: Optional[ResilientCaller] = None,
+                 emission_factors: Optional[EmissionFactorTable] = None,
+                 use_local_factors: bool = True,
+                 prepare_workers: Optional[int] = None):
+        super().__init__(image_max_side=image_max_side, jpeg_quality=jpeg_quality, change_detector=change_detector,
+                         send_changed_regions=send_changed_regions, max_regions=max_regions,
+                         include_overview=include_overview)
+        # Retries, timeouts and circuit breakers per provider; the SDK's own retries are
+        # disabled so every attempt goes through (and is counted by) these
+        self.openai_resilience = openai_resilience if openai_resilience is not None else ResilientCaller(
+            "openai", max_attempts=3, timeout=60.0
+        )
+        self.perplexity_resilience = perplexity_resilience if perplexity_resilience is not None else ResilientCaller(
+            "perplexity", max_attempts=3, timeout=30.0
+        )
+        # openai_base_url and perplexity_url can point at local stand-ins (see benchmarks/bench_pipeline.py)
+        self.openai_client = OpenAI(api_key=openai_api_key, base_url=openai_base_url, max_retries=0,
+                                    timeout=self.openai_resilience.timeout)
+        # Async clients live on a dedicated event loop so they (and their
+        # connection pools) are shared across frames and calling threads
+        self.async_openai_client = AsyncOpenAI(api_key=openai_api_key, base_url=openai_base_url, max_retries=0)
+        self.event_loop = BackgroundEventLoop()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else AsyncRateLimiter(
+            rate_per_second=5.0, burst=10, max_concurrency=8
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Look up all unique items of a frame in one Perplexity request instead of one per item
+        self.batch_emissions = batch_emissions
+        # Produce the trash/compost/recycle recommendations in one structured call
+        self.combined_recommendations = combined_recommendations
+        # Recommendations keyed by the sorted item names in each category
+        self.recommendations_cache = LRUCache(max_entries=256, ttl_seconds=24 * 3600)
+        # Payload size and latency of the most recent vision call, for comparing the two modes
+        self.last_vision_stats: Dict = {}
+        # Optional local detector tried before the vision model (requires ultralytics)
+        self.local_classifier = local_classifier
+        # Vision results keyed by perceptual hashes of the (before, after) pair, so
+        # near-duplicate captures reuse the previous item list without a GPT-4o call
+        if vision_cache is None and cache_vision:
+            vision_cache = PerceptualHashCache(max_entries=64, max_distance=3)
+        self.vision_cache = vision_cache
+        # A hash match is only reused if this pixel diff also finds no change against the
+        # cached pair, since a small new item can barely move the hashes. It is more
+        # sensitive than the gate's defaults: a false alarm here only costs one vision call
+        self.vision_cache_detector = ChangeDetector(threshold=0.0005, pixel_delta=0.3)
+        # Called with every ReportData produced by an analysis, including empty ones (history, dashboards, ...)
+        self.report_listeners: List[Callable[[ReportData], None]] = []
+        # Bin display; the default notifier takes its port from $SERIAL_PORT
+        if notifier is None and notify_hardware:
+            notifier = SerialNotifier()
+        self.notifier = notifier
         self.perplexity_api_key = perplexity_api_key
-        self.perplexity_url = "https://api.perplexity.ai/chat/completions"
-
-    def encode_image(self, image_path: str) -> str:
-        """Encode image as base64 string with resizing."""
-        img = Image.open(image_path)
-        image = img.resize((1000, 1000))  # Resize to suitable resolution
-        
-        with io.BytesIO() as output:
-            image.save(output, format="JPEG")
-            image_bytes = output.getvalue()
-            encoded_image = base64.b64encode(image_bytes).decode('utf-8')
-        return encoded_image
-
-    def analyze_images(self, before_image_path: str, after_image_path: str) -> List[Dict]:
-        """Analyze before and after images using OpenAI Vision API to identify new trash items."""
-        try:
-            encoded_before = self.encode_image(before_image_path)
-            encoded_after = self.encode_image(after_image_path)
-
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text", 
-                                "text": "I will show you two images of a trash area - one before and one after. Please identify only the NEW waste items that appear in the second image and categorize them as trash, recycle, or compost. Return as a JSON list. If there are duplicate new items, list each multiple times. Format: {\"items\": [{\"name\": \"item1\", \"mass_kg\": 0.5, \"proper_category\": \"recycle\"}, {\"name\": \"item2\", \"mass_kg\": 0.3, \"proper_category\": \"compost\"}, ...]}"
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{encoded_before}"
-                                }
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{encoded_after}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=300
-            )
+        self.perplexity_url = perplexity_url
+        # Emissions factors (kg CO2e per kg) keyed by normalized item name
+        self.emissions_cache = emissions_cache if emissions_cache is not None else PersistentLRUCache(
+            DEFAULT_EMISSIONS_CACHE_PATH, max_entries=5000, ttl_seconds=30 * 24 * 3600
+        )
+        # Bundled reference factors matched by fuzzy name before any cache or network lookup
+        if emission_factors is None and use_local_factors:
+            emission_factors = EmissionFactorTable()
+        self.emission_factors = emission_factors
+        REGISTRY.register_cache("emissions", self.emissions_cache)
+        REGISTRY.register_cache("recommendations", self.recommendations_cache)
+        REGISTRY.register_cache("baseline_image", self.baseline_cache)
+        if self.vision_cache is not None:
+            REGISTRY.register_cache("vision", self.vision_cache)
+        if self.emission_factors is not None:
+            REGISTRY.register_cache("emission_factors", self.emission_factors)
+        # Worker processes for analyze_many's image preparation, started on first use and kept
+        # until close(). Spawned rather than forked: this process runs the event loop, notifier
+        # and (under the controller) Flask and job threads, whose locks a fork would copy mid-use
+        self.prepare_workers = prepare_workers
+        self._prepare_pool: Optional[ProcessPoolExecutor] = None
+        self._prepare_pool_lock = threading.Lock()
 
-            return json.loads(response.choices[0].message.content)["items"]
+    def _vision_request(self, content: List[Dict]) -> Dict:
+        """Keyword arguments of the vision chat-completions call, shared by the sync and async clients."""
+        return {
+            "model": "gpt-4o",
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 300
+        }
 
-        except Exception as e:
-            print(f"Error analyzing images: {str(e)}")
-            return []
+    def _vision_items(self, response, mode: str, content: List[Dict], start: float) -> List[Dict]:
+        """Record the call's stats and parse the new items out of a vision response."""
+        images = [part for part in content if part["type"] == "image_url"]
+        self.last_vision_stats = {
+            "mode": mode,
+            "images": len(images),
+            "payload_bytes": sum(len(part["image_url"]["url"]) for part in images),
+            "latency_s": time.perf_counter() - start
+        }
+        print(f"Vision call: {self.last_vision_stats}")
 
-    def get_recommendations(self, trash_items: List[Dict], compost_items: List[Dict], recycle_items: List[Dict]) -> List[str]:
-        """Get recommendations based on trash items, compost items, and recycle items."""
-        prompt = "Based on the items identified in the trash, compost, and recycling bins, provide recommendations to reduce waste and improve recycling rates. Include suggestions for reducing waste, composting, and recycling more effectively. Please make these recommendations at most 2 sentences."
-        print(trash_items)
-        print(compost_items)
-        print(recycle_items)
+        return json.loads(response.choices[0].message.content)["items"]
+
+    def _vision_cache_key(self, before_image_path: ImageSource, after_image_path: ImageSource) -> Optional[Tuple]:
+        """Perceptual hashes of the pair plus grayscale thumbnails for verifying hits, or None without a vision cache."""
+        if self.vision_cache is None:
+            return None
+        width = self.vision_cache_detector.width
+        thumbnails = (load_grayscale(before_image_path, width), load_grayscale(after_image_path, width))
+        return self.vision_cache.key(*thumbnails), thumbnails
+
+    def _same_pair(self, entry: Dict, thumbnails: Tuple) -> bool:
+        detector = self.vision_cache_detector
+        return not any(detector.has_changed(cached, current) for cached, current in zip(entry["thumbnails"], thumbnails))
+
+    def _cached_vision_items(self, cache_key: Optional[Tuple]) -> Optional[List[Dict]]:
+        if cache_key is None:
+            return None
+        hashes, thumbnails = cache_key
+        entry = self.vision_cache.get(hashes, accept=lambda cached: self._same_pair(cached, thumbnails))
+        if entry is None:
+            return None
+        print(f"Near-duplicate frames, reusing {len(entry['items'])} cached items")
+        return [dict(item) for item in entry["items"]]
+
+    def _cache_vision_items(self, cache_key: Optional[Tuple], items: List[Dict]) -> List[Dict]:
+        if cache_key is not None:
+            hashes, thumbnails = cache_key
+            self.vision_cache.set(hashes, {"items": [dict(item) for item in items], "thumbnails": thumbnails})
+        return items
+
+    def analyze_images(self, before_image_path: ImageSource, after_image_path: ImageSource) -> List[Dict]:
+        """Analyze before and after images using OpenAI Vision API to identify new trash items.
+
+        Results are cached by perceptual hashes of both images; a pair within the
+        vision cache's Hamming distance of an earlier one, in which a pixel diff
+        finds no change either, returns its items.
+        Failed or unparseable calls are retried; the last error is raised once
+        retries are exhausted or the OpenAI circuit is open, rather than
+        reporting an empty frame.
+        """
+        cache_key = self._vision_cache_key(before_image_path, after_image_path)
+        cached_items = self._cached_vision_items(cache_key)
+        if cached_items is not None:
+            return cached_items
+
+        start = time.perf_counter()
+        mode, content = self._vision_content(before_image_path, after_image_path)
+
+        def request() -> List[Dict]:
+            with timed("vision_call"):
+                response = self.openai_client.chat.completions.create(**self._vision_request(content))
+            return self._vision_items(response, mode, content, start)
+
+        return self._cache_vision_items(cache_key, self.openai_resilience.call(request, stage="vision_call"))
+
+    async def analyze_content_async(self, mode: str, content: List[Dict],
+                                    cache_key: Optional[Tuple] = None) -> List[Dict]:
+        """Identify new items from already prepared vision content with the async client.
+
+        Must run on self.event_loop; the call is paced by self.rate_limiter.
+        cache_key is the pair's vision cache key from _vision_cache_key, if any.
+        Errors are retried and finally raised, as in analyze_images.
+        """
+        cached_items = self._cached_vision_items(cache_key)
+        if cached_items is not None:
+            return cached_items
+
+        start = time.perf_counter()
+
+        async def request() -> List[Dict]:
+            with timed("vision_call"):
+                response = await self.async_openai_client.chat.completions.create(**self._vision_request(content))
+            return self._vision_items(response, mode, content, start)
+
+        items = await self.openai_resilience.call_async(request, stage="vision_call", limiter=self.rate_limiter)
+        return self._cache_vision_items(cache_key, items)
+
+    def _recommendations_cache_key(self, trash_items: List[Dict], compost_items: List[Dict], recycle_items: List[Dict]) -> tuple:
+        return tuple(
+            tuple(sorted(normalize_item_name(item["item"]) for item in category_items))
+            for category_items in (trash_items, compost_items, recycle_items)
+        )
+
+    def _recommendation_prompts(self, trash_items: List[Dict], compost_items: List[Dict], recycle_items: List[Dict]) -> List[str]:
         trash_prompt = "Trash items: " + ", ".join(item["item"] for item in trash_items)
         compost_prompt = "Compost items: " + ", ".join(item["item"] for item in compost_items)
         recycle_prompt = "Recyclable items: " + ", ".join(item["item"] for item in recycle_items)
-        items = [trash_prompt, compost_prompt, recycle_prompt]
+        return [trash_prompt, compost_prompt, recycle_prompt]
+
+    def get_recommendations(self, trash_items: List[Dict], compost_items: List[Dict], recycle_items: List[Dict]) -> List[str]:
+        """Blocking wrapper around get_recommendations_async for callers outside the event loop."""
+        return self.event_loop.run(self.get_recommendations_async(trash_items, compost_items, recycle_items))
 
-        recommendations = []
+    async def get_recommendations_async(self, trash_items: List[Dict], compost_items: List[Dict],
+                                        recycle_items: List[Dict]) -> List[str]:
+        """Get recommendations based on trash items, compost items, and recycle items.
 
-        for item in items:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": item}
-                ],
-                max_tokens=300
-            )
+        Returns [trash, compost, recycle] recommendations. Results are cached by the
+        multiset of item names in each category, so identical bin contents reuse advice.
+        Calls use the async client and are paced by self.rate_limiter along with the
+        vision and emissions calls. If OpenAI is unavailable, expired cached advice or
+        an empty list is returned.
+        """
+        cache_key = self._recommendations_cache_key(trash_items, compost_items, recycle_items)
+        cached_recommendations = self.recommendations_cache.get(cache_key)
+        if cached_recommendations is not None:
+            return list(cached_recommendations)
+
+        items = self._recommendation_prompts(trash_items, compost_items, recycle_items)
+
+        async def combined_request() -> List[str]:
+            with timed("recommendations_call"):
+                return await self._get_combined_recommendations(items)
+
+        async def single_request(item: str) -> str:
+            with timed("recommendations_call"):
+                response = await self.async_openai_client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {"role": "system", "content": RECOMMENDATIONS_PROMPT},
+                        {"role": "user", "content": item}
+                    ],
+                    max_tokens=300
+                )
+            return response.choices[0].message.content
+
+        try:
+            if self.combined_recommendations:
+                recommendations = await self.openai_resilience.call_async(
+                    combined_request, stage="recommendations_call", limiter=self.rate_limiter)
+            else:
+                recommendations = list(await asyncio.gather(*(
+                    self.openai_resilience.call_async(lambda item=item: single_request(item),
+                                                      stage="recommendations_call", limiter=self.rate_limiter)
+                    for item in items
+                )))
+        except Exception as e:
+            # Recommendations are advisory; don't fail the whole report over them
+            stale_recommendations = self.recommendations_cache.get_stale(cache_key)
+            print(f"Error getting recommendations ({str(e)}), {'using expired cached ones' if stale_recommendations else 'skipping them'}")
+            return list(stale_recommendations) if stale_recommendations is not None else []
 
-            recommendation = response.choices[0].message.content
-            recommendations.append(recommendation)
         print(recommendations)
+        self.recommendations_cache.set(cache_key, tuple(recommendations))
         return recommendations
-        
 
-    async def get_emissions_for_item(self, session: aiohttp.ClientSession, item: Dict) -> Dict:
-        """Get landfill emissions data for a single item using Perplexity API."""
+    async def _get_combined_recommendations(self, items: List[str]) -> List[str]:
+        """Get the trash, compost, and recycle recommendations from a single structured-output call."""
+        response = await self.async_openai_client.beta.chat.completions.parse(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": RECOMMENDATIONS_PROMPT + " Give one recommendation for each of the trash, compost, and recycle bins."},
+                {"role": "user", "content": "\n".join(items)}
+            ],
+            response_format=RecommendationsResponse,
+            max_tokens=600
+        )
+
+        parsed = response.choices[0].message.parsed
+        return [parsed.trash, parsed.compost, parsed.recycle]
+
+    def _emissions_result(self, item: Dict, emissions_per_kg: Optional[float]) -> Dict:
+        """Build the per-item emissions record from an emissions factor (None if unknown)."""
+        return {
+            "item": item['name'],
+            "mass_kg": item['mass_kg'],
+            "proper_category": item['proper_category'],
+            "landfill_emissions": emissions_per_kg * item['mass_kg'] if emissions_per_kg is not None else None
+        }
+
+    async def _perplexity_content(self, session: aiohttp.ClientSession, payload: Dict, stage: str) -> str:
+        """POST a chat request to Perplexity with retries and return the message content."""
         headers = {
             "Authorization": f"Bearer {self.perplexity_api_key}",
             "Content-Type": "application/json"
         }
 
+        async def request() -> str:
+            with timed(stage):
+                async with session.post(
+                    self.perplexity_url, headers=headers, json=payload, ssl=ssl_context
+                ) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        raise ProviderError(f"Status {response.status}, Response: {error_text}", status=response.status)
+                    result = await response.json()
+
+            if 'choices' not in result:
+                raise ProviderError(f"Unexpected API response: {result}")
+            return result['choices'][0]['message']['content']
+
+        return await self.perplexity_resilience.call_async(request, stage=stage, limiter=self.rate_limiter)
+
+    async def _parse_json_with_mini(self, instructions: str, text: str, max_tokens: int) -> str:
+        """Have gpt-4o-mini restructure free text into a JSON object, with retries."""
+        async def request() -> str:
+            with timed("emissions_parse"):
+                response = await self.async_openai_client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": instructions
+                        },
+                        {
+                            "role": "user",
+                            "content": text
+                        }
+                    ],
+                    response_format={"type": "json_object"},
+                    max_tokens=max_tokens
+                )
+            return response.choices[0].message.content
+
+        return await self.openai_resilience.call_async(request, stage="emissions_parse", limiter=self.rate_limiter)
+
+    def _emissions_fallback(self, item: Dict, cache_key: str) -> Dict:
+        """Use an expired cached factor, if there is one, when the lookup failed."""
+        stale_emissions_per_kg = self.emissions_cache.get_stale(cache_key)
+        if stale_emissions_per_kg is not None:
+            print(f"Using expired cached emissions factor for {item['name']}")
+        return self._emissions_result(item, stale_emissions_per_kg)
+
+    def _local_emissions_factor(self, name: str) -> Optional[float]:
+        """Emissions factor from the bundled table, or None if disabled or no entry is close enough."""
+        if self.emission_factors is None:
+            return None
+        return self.emission_factors.emissions_per_kg(name)
+
+    async def get_emissions_for_item(self, session: aiohttp.ClientSession, item: Dict) -> Dict:
+        """Get landfill emissions data for a single item.
+
+        The bundled factor table and the cache are tried first; only unknown
+        items go to the Perplexity API. Calls are retried with backoff; if they
+        still fail (or a circuit is open) an expired cached factor is used,
+        else landfill_emissions is None.
+        """
+        local_emissions_per_kg = self._local_emissions_factor(item['name'])
+        if local_emissions_per_kg is not None:
+            return self._emissions_result(item, local_emissions_per_kg)
+
+        cache_key = normalize_item_name(item['name'])
+        cached_emissions_per_kg = self.emissions_cache.get(cache_key)
+        if cached_emissions_per_kg is not None:
+            return self._emissions_result(item, cached_emissions_per_kg)
+
         payload = {
             "model": "sonar",
             "messages": [
@@ -137,112 +441,244 @@ class TrashAnalyzer:
         }
 
         try:
-            async with session.post(
-                self.perplexity_url, headers=headers, json=payload, ssl=ssl_context
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    print(f"API Error for {item['name']}: Status {response.status}, Response: {error_text}")
-                    return {
-                        "item": item['name'],
-                        "mass_kg": item['mass_kg'],
-                        "proper_category": item['proper_category'],
-                        "landfill_emissions": None
-                    }
-
-                result = await response.json()
-                if 'choices' not in result:
-                    print(f"Unexpected API response for {item['name']}: {result}")
-                    return {
-                        "item": item['name'],
-                        "mass_kg": item['mass_kg'],
-                        "proper_category": item['proper_category'],
-                        "landfill_emissions": None
-                    }
+            perplexity_response = await self._perplexity_content(session, payload, stage="emissions_lookup")
+            print(f"Perplexity response: {perplexity_response}")
 
-                try:
-                    perplexity_response = result['choices'][0]['message']['content']
-                    
-                    print(f"Perplexity response: {perplexity_response}")
-
-                    openai_response = self.openai_client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": "Parse the input and return a JSON object with a single field 'emissions_per_kg' containing just the numeric value."
-                            },
-                            {
-                                "role": "user",
-                                "content": perplexity_response
-                            }
-                        ],
-                        response_format={"type": "json_object"},
-                        max_tokens=100
-                    )
-
-                    content = json.loads(openai_response.choices[0].message.content)
-                    emissions_per_kg = content['emissions_per_kg']
-                    total_emissions = emissions_per_kg * item['mass_kg']
-
-                    return {
-                        "item": item['name'],
-                        "mass_kg": item['mass_kg'],
-                        "proper_category": item['proper_category'],
-                        "landfill_emissions": total_emissions
-                    }
-                except (ValueError, KeyError, json.JSONDecodeError) as e:
-                    print(f"Error parsing response for {item['name']}: {result['choices'][0]['message']['content']}")
-                    return {
-                        "item": item['name'],
-                        "mass_kg": item['mass_kg'],
-                        "proper_category": item['proper_category'],
-                        "landfill_emissions": None
-                    }
+            parsed_response = await self._parse_json_with_mini(
+                "Parse the input and return a JSON object with a single field 'emissions_per_kg' containing just the numeric value.",
+                perplexity_response,
+                max_tokens=100
+            )
+            try:
+                emissions_per_kg = float(json.loads(parsed_response)['emissions_per_kg'])
+            except (ValueError, KeyError, TypeError) as e:
+                record_error("emissions_parse")
+                print(f"Error parsing response for {item['name']}: {perplexity_response}")
+                return self._emissions_fallback(item, cache_key)
+
+            self.emissions_cache.set(cache_key, emissions_per_kg)
+            return self._emissions_result(item, emissions_per_kg)
 
         except Exception as e:
             print(f"Error getting emissions for {item['name']}: {str(e)}")
-            return {
-                "item": item['name'],
-                "mass_kg": item['mass_kg'],
-                "proper_category": item['proper_category'],
-                "landfill_emissions": None
-            }
-        
+            return self._emissions_fallback(item, cache_key)
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session, creating it on the analyzer's event loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
     async def get_all_emissions(self, items: List[Dict]) -> List[Dict]:
-        """Get landfill emissions data for all items concurrently."""
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for item in items:
-                task = self.get_emissions_for_item(session, item)
-                tasks.append(task)
-                await asyncio.sleep(0.5)
-            results = await asyncio.gather(*tasks)
+        """Get landfill emissions data for all items concurrently.
+
+        Must run on self.event_loop; requests are paced by self.rate_limiter.
+        """
+        session = await self.get_session()
+        tasks = [self.get_emissions_for_item(session, item) for item in items]
+        return await asyncio.gather(*tasks)
+
+    def _parse_batch_emissions(self, content: str) -> Dict[str, float]:
+        """Parse a BatchEmissionsResponse JSON string into {normalized name: emissions_per_kg}."""
+        parsed = BatchEmissionsResponse.model_validate_json(content)
+        return {normalize_item_name(entry.name): entry.emissions_per_kg for entry in parsed.items}
+
+    async def get_batch_emissions_factors(self, session: aiohttp.ClientSession, names: List[str]) -> Dict[str, float]:
+        """Get emissions factors for several items with a single Perplexity request.
+
+        Returns {normalized name: emissions_per_kg} for every item the response covered.
+        Raises once the request has failed all its retries.
+        """
+        item_list = "\n".join(f"- {name}" for name in names)
+        payload = {
+            "model": "sonar",
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "Return a JSON object with a field 'items' containing one object per input item, each with the item 'name' copied exactly from the input and a numeric 'emissions_per_kg'."
+                },
+                {
+                    "role": "user",
+                    "content": f"What is the carbon footprint (in CO2 equivalent) per kilogram of disposing each of the following items in a landfill? Give each value in kg CO2e/kg.\n{item_list}"
+                }
+            ],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"schema": BatchEmissionsResponse.model_json_schema()}
+            },
+            "max_tokens": 60 * len(names) + 100,
+            "temperature": 0.2,
+            "top_p": 0.9
+        }
+
+        perplexity_response = await self._perplexity_content(session, payload, stage="emissions_batch")
+        print(f"Perplexity batch response: {perplexity_response}")
+
+        try:
+            return self._parse_batch_emissions(perplexity_response)
+        except ValueError:
+            pass
+
+        # Perplexity occasionally wraps the JSON in prose; have gpt-4o-mini restructure it
+        parsed_response = await self._parse_json_with_mini(
+            "Parse the input and return a JSON object with a field 'items' containing objects with the item 'name' and its numeric 'emissions_per_kg'.",
+            perplexity_response,
+            max_tokens=60 * len(names) + 100
+        )
+
+        try:
+            return self._parse_batch_emissions(parsed_response)
+        except ValueError:
+            record_error("emissions_parse")
+            print(f"Error parsing batch response: {perplexity_response}")
+            return {}
+
+    async def get_all_emissions_batched(self, items: List[Dict]) -> List[Dict]:
+        """Get landfill emissions data for all items with at most one Perplexity request.
+
+        Items are collapsed to unique normalized names, bundled and cached factors
+        are reused, and the per-kg factors are fanned back out to each item's mass_kg. Items
+        the batch response does not cover fall back to individual lookups.
+        """
+        factors: Dict[str, float] = {}
+        missing: Dict[str, str] = {}
+        for item in items:
+            key = normalize_item_name(item['name'])
+            if key in factors or key in missing:
+                continue
+            local_emissions_per_kg = self._local_emissions_factor(item['name'])
+            if local_emissions_per_kg is not None:
+                factors[key] = local_emissions_per_kg
+                continue
+            cached_emissions_per_kg = self.emissions_cache.get(key)
+            if cached_emissions_per_kg is not None:
+                factors[key] = cached_emissions_per_kg
+            else:
+                missing[key] = item['name']
+
+        session = await self.get_session()
+        if missing:
+            try:
+                batch_factors = await self.get_batch_emissions_factors(session, list(missing.values()))
+            except Exception as e:
+                print(f"Error getting batch emissions: {str(e)}")
+                batch_factors = {}
+
+            for key in missing:
+                if key in batch_factors:
+                    factors[key] = batch_factors[key]
+                    self.emissions_cache.set(key, batch_factors[key])
+
+        results = []
+        fallback_tasks = {}
+        for item in items:
+            key = normalize_item_name(item['name'])
+            if key in factors:
+                results.append(self._emissions_result(item, factors[key]))
+            else:
+                results.append(None)
+                fallback_tasks[len(results) - 1] = self.get_emissions_for_item(session, item)
+
+        if fallback_tasks:
+            print(f"Batch response missed {len(fallback_tasks)} items, looking them up individually")
+            fallback_results = await asyncio.gather(*fallback_tasks.values())
+            for index, result in zip(fallback_tasks, fallback_results):
+                results[index] = result
+
+        return results
+
+    async def get_emissions(self, items: List[Dict]) -> List[Dict]:
+        """Get landfill emissions data for all items, batched or per item depending on configuration."""
+        if self.batch_emissions:
+            return await self.get_all_emissions_batched(items)
+        return await self.get_all_emissions(items)
+
+    async def _close_async_clients(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        await self.async_openai_client.close()
+
+    def close(self) -> None:
+        """Close the shared HTTP clients and stop the background event loop."""
+        if self.event_loop.loop.is_closed():
+            return
+        self.event_loop.run(self._close_async_clients())
+        self.event_loop.close()
+        if self._prepare_pool is not None:
+            self._prepare_pool.shutdown(cancel_futures=True)
+        if self.notifier is not None:
+            self.notifier.close()
+
+    def add_report_listener(self, listener: Callable[[ReportData], None]) -> None:
+        self.report_listeners.append(listener)
+
+    def _notify_report_listeners(self, report_data: ReportData) -> None:
+        for listener in self.report_listeners:
+            try:
+                listener(report_data)
+            except Exception as e:
+                print(f"Error in report listener: {str(e)}")
+
+    def identify_new_items(self, before_image_path: ImageSource, after_image_path: ImageSource) -> List[Dict]:
+        """Identify new items, trying the change gate and local classifier before the vision model."""
+        if not self.has_changed(before_image_path, after_image_path):
+            return []
+
+        items = None
+        if self.local_classifier is not None:
+            try:
+                items = self.local_classifier.classify(before_image_path, after_image_path)
+            except Exception as e:
+                print(f"Local classifier failed, falling back to vision model: {str(e)}")
+        if items is None:
+            items = self.analyze_images(before_image_path, after_image_path)
+        return items
+
+    async def emit_emissions(self, items: List[Dict], emit: Callable[[Dict], None]) -> List[Dict]:
+        """Look up emissions for all items, passing each record to emit as soon as it completes.
+
+        Must run on self.event_loop. In batched mode all records arrive together
+        once the single batch request returns. Returns the records in item order.
+        """
+        if self.batch_emissions:
+            results = await self.get_all_emissions_batched(items)
+            for result in results:
+                emit(result)
             return results
 
-    def analyze_trash(self, before_image_path: str, after_image_path: str) -> ReportData:
-        """Analyze new items in trash and calculate emissions impact."""
-        items = self.analyze_images(before_image_path, after_image_path)
-        
-        if not items:
-            return ReportData(0, 0, 0, [], [], [], 0.0, 0.0, 0.0)
+        session = await self.get_session()
+
+        async def lookup(item: Dict) -> Dict:
+            result = await self.get_emissions_for_item(session, item)
+            emit(result)
+            return result
+
+        return list(await asyncio.gather(*(lookup(item) for item in items)))
 
-        emissions_data = asyncio.run(self.get_all_emissions(items))
-        
+    def send_feedback(self, items: List[Dict]) -> None:
+        """Tell the bin display whether the new items belonged in the trash."""
+        if self.notifier is None:
+            return
+        misplaced = any(item["proper_category"] in ("compost", "recycle") for item in items)
+
+        # Send notifications to hardware; queued, so this never blocks on the serial port
+        self.notifier.send("incorrect" if misplaced else "correct")
+
+    def _split_by_category(self, records: List[Dict]) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        trash_items = [item for item in records if item["proper_category"] == "trash"]
+        compost_items = [item for item in records if item["proper_category"] == "compost"]
+        recycle_items = [item for item in records if item["proper_category"] == "recycle"]
+        return trash_items, compost_items, recycle_items
+
+    async def recommendations_for_items(self, items: List[Dict]) -> List[str]:
+        """Get recommendations straight from the identified items; they only need names and categories."""
+        records = [{"item": item["name"], "proper_category": item["proper_category"]} for item in items]
+        return await self.get_recommendations_async(*self._split_by_category(records))
+
+    def build_report(self, emissions_data: List[Dict], recommendations: List[str]) -> ReportData:
+        """Aggregate per-item emissions records into a ReportData."""
         # Group items by their proper category
-        trash_items = [item for item in emissions_data if item["proper_category"] == "trash"]
-        compost_items = [item for item in emissions_data if item["proper_category"] == "compost"]
-        recycle_items = [item for item in emissions_data if item["proper_category"] == "recycle"]
-
-        # Send notifications to hardware
-        ser = serial.Serial('/dev/tty.usbmodem1101', 115200, timeout=1)        
-        if (compost_items != [] or recycle_items != []):
-            ser.write(f"incorrect\n".encode())
-            print(f"Sent command: incorrect")
-        else:
-            ser.write(f"correct\n".encode())
-            print(f"Sent command: correct")
-        ser.close()
+        trash_items, compost_items, recycle_items = self._split_by_category(emissions_data)
 
         # Calculate scope 2 emissions for each category going to landfill
         trash_emissions = sum(item["landfill_emissions"] for item in trash_items 
@@ -251,8 +687,6 @@ class TrashAnalyzer:
                               if item["landfill_emissions"] is not None)
         recycle_emissions = sum(item["landfill_emissions"] for item in recycle_items 
                               if item["landfill_emissions"] is not None)
-        
-        recommendations = self.get_recommendations(trash_items, compost_items, recycle_items)
 
         return ReportData(
             numTrash=len(trash_items),
@@ -264,9 +698,208 @@ class TrashAnalyzer:
             trashEmissions=trash_emissions,
             compostInTrashEmissions=compost_emissions,
             recycleInTrashEmissions=recycle_emissions,
-            recommendations=recommendations
+            recommendations=recommendations,
+            items=emissions_data
         )
 
+    def build_stage_graph(self, before_image_path: ImageSource, after_image_path: ImageSource,
+                          emit: Callable[[str, object], None]) -> StageGraph:
+        """Build the analysis DAG: classify, then feedback, emissions and recommendations concurrently.
+
+        The bin display is notified as soon as the items are classified, and
+        recommendations only need item names, so neither waits on the emissions
+        lookups. Blocking stages run in the event loop's default executor.
+        """
+        def items_of(results: Dict) -> List[Dict]:
+            return results["classify"]
+
+        async def feedback(results: Dict) -> None:
+            if items_of(results):
+                self.send_feedback(items_of(results))
+
+        async def emissions(results: Dict) -> List[Dict]:
+            if not items_of(results):
+                return []
+            return await self.emit_emissions(items_of(results), lambda result: emit("emissions", result))
+
+        async def recommendations(results: Dict) -> List[str]:
+            if not items_of(results):
+                return []
+            return await self.recommendations_for_items(items_of(results))
+
+        graph = StageGraph()
+        graph.add("classify", lambda results: asyncio.to_thread(self.identify_new_items, before_image_path, after_image_path))
+        graph.add("feedback", feedback, deps=["classify"])
+        graph.add("emissions", emissions, deps=["classify"])
+        graph.add("recommendations", recommendations, deps=["classify"])
+        return graph
+
+    def analyze_trash_stream(self, before_image_path: ImageSource, after_image_path: ImageSource) -> Iterator[Tuple[str, object]]:
+        """Analyze new items in trash, yielding partial results as each stage finishes.
+
+        Yields (event, data) pairs:
+            ("items", list of new items) as soon as the items are identified
+            ("emissions", per-item emissions record) as each lookup completes
+            ("recommendations", list of recommendations), possibly before the emissions
+            ("report", ReportData) last, with per-stage timings in stageTimings
+        """
+        events = queue.Queue()
+
+        def emit(event: str, data) -> None:
+            events.put((event, data))
+
+        graph = self.build_stage_graph(before_image_path, after_image_path, emit)
+
+        def on_stage_done(name: str, result) -> None:
+            if name == "classify":
+                emit("items", result)
+            elif name == "recommendations" and result:
+                emit("recommendations", result)
+
+        started_at = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(graph.run(on_stage_done), self.event_loop.loop)
+        future.add_done_callback(lambda _: events.put(None))
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield event
+        results = future.result()
+
+        stage_timings = dict(graph.timings)
+        stage_timings["total"] = {"start_s": 0.0, "duration_s": time.perf_counter() - started_at}
+        record_pipeline(stage_timings)
+        print("Stage timings: " + ", ".join(f"{name} +{t['start_s']:.2f}s ({t['duration_s']:.2f}s)" for name, t in stage_timings.items()))
+
+        if not results["classify"]:
+            report_data = ReportData(0, 0, 0, [], [], [], 0.0, 0.0, 0.0, stageTimings=stage_timings)
+            # Listeners tracking bin contents need to see it emptied too
+            self._notify_report_listeners(report_data)
+            yield "report", report_data
+            return
+        print(f"Emissions cache: {self.emissions_cache.stats()}")
+        if self.emission_factors is not None:
+            print(f"Bundled emissions factors: {self.emission_factors.stats()}")
+
+        report_data = self.build_report(results["emissions"], results["recommendations"])
+        report_data.stageTimings = stage_timings
+        self._notify_report_listeners(report_data)
+        yield "report", report_data
+
+    def analyze_trash(self, before_image_path: ImageSource, after_image_path: ImageSource) -> ReportData:
+        """Analyze new items in trash and calculate emissions impact."""
+        for event, data in self.analyze_trash_stream(before_image_path, after_image_path):
+            if event == "report":
+                return data
+
+    def _empty_report(self, bin_id: str) -> ReportData:
+        report_data = ReportData(0, 0, 0, [], [], [], 0.0, 0.0, 0.0, binId=bin_id)
+        self._notify_report_listeners(report_data)
+        return report_data
+
+    async def _analyze_prepared(self, bin_id: str, before_image_path: ImageSource, after_image_path: ImageSource,
+                                prepared: Optional[Tuple[str, List[Dict]]]) -> ReportData:
+        """Network half of the pipeline for one bin whose images were prepared in a worker process."""
+        if prepared is None:
+            return self._empty_report(bin_id)
+
+        items = None
+        if self.local_classifier is not None:
+            try:
+                items = await asyncio.to_thread(self.local_classifier.classify, before_image_path, after_image_path)
+            except Exception as e:
+                print(f"Local classifier failed, falling back to vision model: {str(e)}")
+        if items is None:
+            cache_key = await asyncio.to_thread(self._vision_cache_key, before_image_path, after_image_path)
+            items = await self.analyze_content_async(*prepared, cache_key=cache_key)
+        if not items:
+            return self._empty_report(bin_id)
+
+        self.send_feedback(items)
+        emissions_data, recommendations = await asyncio.gather(
+            self.get_emissions(items),
+            self.recommendations_for_items(items)
+        )
+
+        report_data = self.build_report(emissions_data, recommendations)
+        report_data.binId = bin_id
+        self._notify_report_listeners(report_data)
+        return report_data
+
+    async def _analyze_many(self, pairs: List[Tuple[str, ImageSource, ImageSource]],
+                            pool: ProcessPoolExecutor) -> Tuple[Dict[str, ReportData], Dict]:
+        start = time.perf_counter()
+        prepare_done = []
+
+        async def analyze_bin(bin_id: str, before_image_path: ImageSource, after_image_path: ImageSource) -> Optional[ReportData]:
+            try:
+                try:
+                    prepared = await asyncio.wrap_future(pool.submit(prepare_in_worker, before_image_path, after_image_path))
+                except BrokenProcessPool:
+                    # A worker died and took the pool with it; retry once on a fresh pool
+                    retry_pool = self._replace_prepare_pool(pool)
+                    prepared = await asyncio.wrap_future(retry_pool.submit(prepare_in_worker, before_image_path, after_image_path))
+                prepare_done.append(time.perf_counter())
+                return await self._analyze_prepared(bin_id, before_image_path, after_image_path, prepared)
+            except Exception as e:
+                print(f"Error analyzing bin {bin_id}: {str(e)}")
+                return None
+
+        results = await asyncio.gather(*(analyze_bin(*pair) for pair in pairs))
+        elapsed = time.perf_counter() - start
+
+        reports = {bin_id: report_data for (bin_id, _, _), report_data in zip(pairs, results) if report_data is not None}
+        stats = {
+            "frames": len(pairs),
+            "analyzed": sum(1 for report_data in reports.values() if report_data.items),
+            "failed": len(pairs) - len(reports),
+            "prepare_s": max(prepare_done) - start if prepare_done else 0.0,
+            "elapsed_s": elapsed,
+            "frames_per_second": len(pairs) / elapsed if elapsed else 0.0
+        }
+        return reports, stats
+
+    def prepare_pool(self) -> ProcessPoolExecutor:
+        """The analyzer's long-lived image preparation pool (prepare_workers spawned processes).
+
+        Each worker gets its own copy of this analyzer's preparer at startup, so
+        a baseline image is encoded once per worker rather than once per bin.
+        """
+        with self._prepare_pool_lock:
+            if self._prepare_pool is None:
+                self._prepare_pool = ProcessPoolExecutor(max_workers=self.prepare_workers,
+                                                         mp_context=multiprocessing.get_context("spawn"),
+                                                         initializer=init_worker,
+                                                         initargs=(self.frame_preparer(),))
+            return self._prepare_pool
+
+    def _replace_prepare_pool(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Swap a broken preparation pool for a new one; concurrent callers share the replacement."""
+        with self._prepare_pool_lock:
+            if self._prepare_pool is broken:
+                self._prepare_pool = None
+                broken.shutdown(wait=False, cancel_futures=True)
+        return self.prepare_pool()
+
+    def analyze_many(self, pairs: List[Tuple[str, ImageSource, ImageSource]]) -> Tuple[Dict[str, ReportData], Dict]:
+        """Analyze (bin_id, before, after) pairs for several bins at once.
+
+        Change detection and image encoding run in the analyzer's process
+        pool across cores; the vision, emissions and recommendation calls of
+        all bins run concurrently on the analyzer's event loop under the
+        shared rate limiter. The first call pays for starting the workers.
+
+        Returns ({bin_id: ReportData}, throughput stats). A bin whose analysis
+        failed is missing from the reports and counted in stats["failed"].
+        """
+        bin_ids = [bin_id for bin_id, _, _ in pairs]
+        if len(set(bin_ids)) != len(bin_ids):
+            raise ValueError("analyze_many() needs a distinct bin_id per pair")
+
+        reports, stats = self.event_loop.run(self._analyze_many(pairs, self.prepare_pool()))
+        print(f"Analyzed {stats['frames']} bins in {stats['elapsed_s']:.2f}s ({stats['frames_per_second']:.2f} frames/s)")
+        return reports, stats
+
 def main():
     # Load environment variables from .env file
     load_dotenv()
@@ -277,22 +910,26 @@ def main():
     
     analyzer = TrashAnalyzer(openai_api_key, perplexity_api_key)
     
-    # Example usage with before and after images
-    #before_image_path = "sample-images/IMG_6702.jpg"
-    before_image_path = "../sample-images/notrash.jpg"
-    after_image_path = "../sample-images/IMG_6703.jpg"
-    report_data = analyzer.analyze_trash(before_image_path, after_image_path)
+    try:
+        # Example usage with before and after images
+        #before_image_path = "sample-images/IMG_6702.jpg"
+        before_image_path = "../sample-images/notrash.jpg"
+        after_image_path = "../sample-images/IMG_6703.jpg"
+        report_data = analyzer.analyze_trash(before_image_path, after_image_path)
     
-    print("\nAnalysis Results:")
-    print(f"Number of trash items: {report_data.numTrash}")
-    print(f"Number of compost items: {report_data.numCompost}")
-    print(f"Number of recycle items: {report_data.numRecycle}")
-    print(f"Trash items: {', '.join(report_data.trashNames)}")
-    print(f"Recyclable items: {', '.join(report_data.recycleNames)}")
-    print(f"Compostable items: {', '.join(report_data.compostNames)}")
-    print(f"CO2 impact from trash: {report_data.trashEmissions:.3f} kg CO2e")
-    print(f"CO2 impact from compost in trash: {report_data.compostInTrashEmissions:.3f} kg CO2e")
-    print(f"CO2 impact from recyclables in trash: {report_data.recycleInTrashEmissions:.3f} kg CO2e")
+        print("\nAnalysis Results:")
+        print(f"Number of trash items: {report_data.numTrash}")
+        print(f"Number of compost items: {report_data.numCompost}")
+        print(f"Number of recycle items: {report_data.numRecycle}")
+        print(f"Trash items: {', '.join(report_data.trashNames)}")
+        print(f"Recyclable items: {', '.join(report_data.recycleNames)}")
+        print(f"Compostable items: {', '.join(report_data.compostNames)}")
+        print(f"CO2 impact from trash: {report_data.trashEmissions:.3f} kg CO2e")
+        print(f"CO2 impact from compost in trash: {report_data.compostInTrashEmissions:.3f} kg CO2e")
+        print(f"CO2 impact from recyclables in trash: {report_data.recycleInTrashEmissions:.3f} kg CO2e")
+    finally:
+        # The display command is written by the notifier's thread; close() waits for it
+        analyzer.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        """In-memory LRU cache with an optional time-to-live per entry."""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired.
+
+        Expired entries stay until evicted so get_stale() can still serve them.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry[1]):
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key even if it has expired (a fallback when the source is down)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return default if entry is None else entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+class PersistentLRUCache(LRUCache):
+    def __init__(self, path: str, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        """LRU cache backed by a JSON file so entries survive process restarts.
+
+        Keys must be strings and values JSON serializable. The whole file is
+        rewritten atomically on every update, which is fine for the small
+        tables this is meant for (a few thousand entries at most).
+        """
+        super().__init__(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.path = path
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable cache file {self.path}: {str(e)}")
+            return
+
+        # Entries are stored oldest first, so insertion order restores LRU order.
+        # Expired entries are kept for get_stale() until evicted.
+        for key, value, stored_at in stored.get("entries", []):
+            self._entries[key] = (value, stored_at)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            entries = [[key, value, stored_at] for key, (value, stored_at) in self._entries.items()]
+
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"entries": entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error writing cache file {self.path}: {str(e)}")
+
+    def set(self, key: str, value: Any) -> None:
+        super().set(key, value)
+        self._save()
+
+    def clear(self) -> None:
+        super().clear()
+        self._save()
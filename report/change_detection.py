@@ -0,0 +1,165 @@
+import io
+from typing import List, Tuple
+import cv2
+import numpy as np
+from PIL import Image
+from image_encoding import ImageSource
+
+
+_REDUCED_GRAYSCALE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+]
+
+
+def _grayscale_read_flag(image_width: int, width: int) -> int:
+    """Pick the largest JPEG decode reduction that still leaves at least 2x the working width."""
+    for factor, flag in _REDUCED_GRAYSCALE_FLAGS:
+        if image_width // factor >= 2 * width:
+            return flag
+    return cv2.IMREAD_GRAYSCALE
+
+
+def load_grayscale(image: ImageSource, width: int = 160) -> np.ndarray:
+    """Load an image as a small grayscale array for cheap comparisons.
+
+    Frames are subsampled before colour conversion, and JPEG paths and bytes
+    are decoded at reduced resolution, so even full-size photos are cheap.
+    """
+    if isinstance(image, np.ndarray):
+        step = max(1, image.shape[1] // (2 * width))
+        image = image[::step, ::step]
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    else:
+        source = io.BytesIO(image) if isinstance(image, (bytes, bytearray)) else image
+        # Only the header is read here, to choose the decode reduction
+        with Image.open(source) as img:
+            flag = _grayscale_read_flag(img.size[0], width)
+        if isinstance(image, (bytes, bytearray)):
+            gray = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), flag)
+        else:
+            gray = cv2.imread(image, flag)
+    if gray is None:
+        raise ValueError("Could not read the image")
+
+    height = max(1, round(gray.shape[0] * width / gray.shape[1]))
+    return cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+
+
+class ChangeDetector:
+    def __init__(self, threshold: float = 0.001, pixel_delta: float = 0.4, width: int = 160, blur_kernel: int = 5):
+        """
+        Detect whether anything changed between two images of the bin.
+
+        The decision rests on the largest connected changed region rather than
+        the total fraction of changed pixels, so one small new item in a
+        cluttered bin counts even when most of its pixels are close to the
+        background. Small or low-contrast items can still slip under the
+        threshold, and a skipped frame loses its items, so err low.
+
+        Args:
+            threshold (float): Area of the largest changed region, as a fraction of the frame, for the scene to count as changed
+            pixel_delta (float): Per-pixel difference, in standard deviations of each image, that counts as a change
+            width (int): Width both images are downscaled to before comparing
+            blur_kernel (int): Gaussian blur kernel size used to suppress sensor noise
+        """
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.width = width
+        self.blur_kernel = blur_kernel
+
+    def _normalize(self, gray: np.ndarray) -> np.ndarray:
+        # Zero mean, unit contrast so global lighting and exposure shifts cancel out
+        gray = cv2.GaussianBlur(gray, (self.blur_kernel, self.blur_kernel), 0).astype(np.float32)
+        return (gray - gray.mean()) / (gray.std() + 1e-6)
+
+    def difference_mask(self, before: ImageSource, after: ImageSource) -> np.ndarray:
+        """Return a uint8 mask (255 = changed) at the detector's working resolution."""
+        before_gray = load_grayscale(before, self.width)
+        after_gray = load_grayscale(after, self.width)
+        if after_gray.shape != before_gray.shape:
+            after_gray = cv2.resize(after_gray, (before_gray.shape[1], before_gray.shape[0]), interpolation=cv2.INTER_AREA)
+
+        changed = np.abs(self._normalize(before_gray) - self._normalize(after_gray)) > self.pixel_delta
+        mask = changed.astype(np.uint8) * 255
+        # Drop isolated speckles left over from noise
+        return cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+
+    def change_score(self, before: ImageSource, after: ImageSource) -> float:
+        """Return the area of the largest changed region, as a fraction of the image."""
+        mask = self.difference_mask(before, after)
+        # Bridge one-pixel gaps so an item with low-contrast patches stays one region
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if count <= 1:
+            return 0.0
+        # Label 0 is the unchanged background
+        return float(stats[1:, cv2.CC_STAT_AREA].max()) / mask.size
+
+    def has_changed(self, before: ImageSource, after: ImageSource) -> bool:
+        return self.change_score(before, after) >= self.threshold
+
+    def changed_regions(self, before: ImageSource, after: ImageSource, max_regions: int = 4,
+                        padding: float = 0.05, min_area: float = 0.001) -> List[Tuple[float, float, float, float]]:
+        """
+        Find the regions that changed between the two images.
+
+        Args:
+            max_regions (int): Maximum number of boxes to return; smaller boxes are merged into one when exceeded
+            padding (float): Margin added around each box, as a fraction of the image size
+            min_area (float): Boxes smaller than this fraction of the image are ignored
+
+        Returns:
+            list: (x1, y1, x2, y2) boxes as fractions of the image width and height, largest first
+        """
+        mask = self.difference_mask(before, after)
+        height, width = mask.shape
+        # Join nearby blobs so one item does not become several boxes
+        mask = cv2.dilate(mask, np.ones((5, 5), np.uint8), iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        boxes = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h < min_area * width * height:
+                continue
+            boxes.append((
+                max(0.0, x / width - padding),
+                max(0.0, y / height - padding),
+                min(1.0, (x + w) / width + padding),
+                min(1.0, (y + h) / height + padding)
+            ))
+
+        boxes = _merge_overlapping(boxes)
+        boxes.sort(key=_box_area, reverse=True)
+        if len(boxes) > max_regions:
+            boxes = boxes[:max_regions - 1] + [_union(boxes[max_regions - 1:])]
+        return boxes
+
+
+def _box_area(box: Tuple[float, float, float, float]) -> float:
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+def _union(boxes: List[Tuple[float, float, float, float]]) -> Tuple[float, float, float, float]:
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def _merge_overlapping(boxes: List[Tuple[float, float, float, float]]) -> List[Tuple[float, float, float, float]]:
+    """Repeatedly merge boxes that overlap (padding can make neighbours touch)."""
+    merged = list(boxes)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            for j in range(i + 1, len(merged)):
+                a, b = merged[i], merged[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    merged[i] = _union([a, b])
+                    del merged[j]
+                    changed = True
+                    break
+            if changed:
+                break
+    return merged
@@ -1,42 +1,172 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request, stream_with_context
 from report import ReportData, Report
 from basic_pipeline import EmissionsResponse, TrashAnalyzer
 from analyze_trash import CameraCapture
+from jobs import JobManager, JobQueueFull
+from history import ReportStore, NewItemsFilter, DEFAULT_HISTORY_PATH
+from rolling_counters import MisplacementAggregator
+from metrics import REGISTRY
 from dotenv import load_dotenv
 
 import os
+import json
+import time
+import threading
+from typing import Callable
 
 
+# Load environment variables
+load_dotenv()
+
+BEFORE_IMAGE_PATH = "sample-images/before.jpg"
+PIPELINE_JOB_KEY = "pipeline"
 
 app = Flask(__name__)
 
+# App-level singletons: the analyzer and camera are built once and shared by all requests
+_analyzer = None
+_camera = None
+_singleton_lock = threading.Lock()
+jobs = JobManager(max_workers=int(os.getenv("PIPELINE_WORKERS", "2")))
+history = ReportStore(os.getenv("REPORT_HISTORY_PATH", DEFAULT_HISTORY_PATH))
+misplaced = MisplacementAggregator()
+
+def get_analyzer() -> TrashAnalyzer:
+    global _analyzer
+    with _singleton_lock:
+        if _analyzer is None:
+            # Initialize API keys
+            openai_api_key = os.getenv("OPENAI_API_KEY")
+            perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
+
+            if not openai_api_key or not perplexity_api_key:
+                raise RuntimeError("Missing API keys in .env file")
+
+            _analyzer = TrashAnalyzer(openai_api_key, perplexity_api_key)
+            # Every run compares against the fixed BEFORE_IMAGE_PATH, so each report lists the
+            # whole bin; history and the misplacement counters only get the newly added items
+            _analyzer.add_report_listener(NewItemsFilter(_analyzer.build_report, [history.add, misplaced.update]))
+        return _analyzer
+
+def get_camera() -> CameraCapture:
+    global _camera
+    with _singleton_lock:
+        if _camera is None:
+            _camera = CameraCapture()
+        return _camera
+
+def run_pipeline(publish: Callable[[str, object], None]) -> dict:
+    """Capture a frame and analyze it against the baseline image, publishing each stage's events."""
+    analyzer = get_analyzer()
+    after_path = get_camera().capture_image()
+    if after_path is None:
+        raise RuntimeError("Could not capture an image")
+
+    result = None
+    for event, data in analyzer.analyze_trash_stream(BEFORE_IMAGE_PATH, after_path):
+        if event == "report":
+            data = result = Report(report_data=data).to_dict()
+        publish(event, data)
+    return result
+
+def submit_pipeline():
+    # Concurrent submissions, polling or streaming, join the run that is already in flight
+    return jobs.submit(run_pipeline, key=PIPELINE_JOB_KEY, stream=True)
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    try:
+        job = submit_pipeline()
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 429
+    return jsonify(job.to_dict()), 202
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
 @app.route('/api/data')
 def get_data():
-    
-    # Load environment variables
-    load_dotenv()
-    
-    # Initialize API keys
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
-    
-    if not openai_api_key or not perplexity_api_key:
-        print("Error: Missing API keys in .env file")
-        return
-
-    # Initialize analyzer
-    analyzer = TrashAnalyzer(openai_api_key, perplexity_api_key)
-    
-    # # Initialize camera and capture images
-    camera = CameraCapture()
-    
-    before_path = "sample-images/before.jpg"
-    after_path = camera.capture_image()
-    
-    report_data = analyzer.analyze_trash(before_path, after_path)
-
-    report = Report(report_data=report_data)
-    return jsonify(report.to_dict())  # Send as JSON
+    """Return the latest report immediately and start a fresh run in the background.
+
+    Only the very first request, before any report exists, waits for a run to finish.
+    """
+    try:
+        job = submit_pipeline()
+    except JobQueueFull:
+        job = jobs.active(PIPELINE_JOB_KEY)
+
+    latest = jobs.latest_finished(PIPELINE_JOB_KEY)
+    if latest is None and job is not None:
+        job.done.wait()
+        latest = job if job.status == "done" else None
+
+    if latest is None:
+        error = job.error if job is not None else "No report available"
+        return jsonify({"error": error}), 500
+    return jsonify(latest.result)  # Send as JSON
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/stream')
+def stream_data():
+    """Stream a pipeline run as Server-Sent Events.
+
+    Events: "items" once the new items are identified, then one "emissions" per item
+    as its lookup completes and "recommendations" (these two stages run concurrently,
+    so they may interleave), then the full "report" (or "error").
+
+    Clients share the in-flight pipeline job with each other and with /api/data, so
+    any number of dashboards cost one run; a client that connects mid-run first
+    receives the events published so far.
+    """
+    def generate():
+        try:
+            job = submit_pipeline()
+        except JobQueueFull as e:
+            yield sse_event("error", {"error": str(e)})
+            return
+        for event, data in job.iter_events():
+            yield sse_event(event, data)
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/api/history')
+def get_history():
+    """Aggregated counts and emissions for a time range.
+
+    Query parameters: start and end as unix seconds (default: the last 24 hours),
+    optional bin_id and category.
+    """
+    try:
+        end = float(request.args.get("end", time.time()))
+        start = float(request.args.get("start", end - 24 * 3600))
+    except ValueError:
+        return jsonify({"error": "start and end must be unix timestamps"}), 400
+
+    bin_id = request.args.get("bin_id")
+    return jsonify({
+        "summary": history.summary(start, end, bin_id=bin_id),
+        "items": history.item_totals(start, end, bin_id=bin_id, category=request.args.get("category"))
+    })
+
+@app.route('/api/misplaced')
+def get_misplaced():
+    """Misplaced items and their emissions over rolling windows (?window=hour or day; default both)."""
+    window = request.args.get("window")
+    if window is not None and window not in misplaced.windows:
+        return jsonify({"error": f"window must be one of {misplaced.windows}"}), 400
+    return jsonify(misplaced.totals(window))
+
+@app.route('/metrics')
+def get_metrics():
+    """Per-stage latency histograms, call/error/retry counters and cache hits in Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 if __name__ == '__main__':
     app.run(debug=True)
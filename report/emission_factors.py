@@ -0,0 +1,120 @@
+import os
+import re
+import csv
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+# Approximate landfill factors (kg CO2e per kg disposed) adapted from the EPA
+# Waste Reduction Model (WARM) material categories
+DEFAULT_EMISSION_FACTORS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "emission_factors.csv")
+
+
+def normalize_item_name(name: str) -> str:
+    """Normalize a free-text item name so trivially different spellings share a cache entry."""
+    name = re.sub(r"[^a-z0-9 ]+", " ", name.lower())
+    words = name.split()
+    # Treat simple plurals ("bottles", "cups") as the singular form
+    words = [word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word for word in words]
+    return " ".join(words)
+
+
+# Trailing phrases that qualify the item rather than name it ("bottle of beer", "cup with lid")
+_QUALIFIER_PATTERN = re.compile(r" (?:with|of|from|in|on|for) .*$")
+
+
+def _trigrams(name: str) -> Set[str]:
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EmissionFactorTable:
+    def __init__(self, path: str = DEFAULT_EMISSION_FACTORS_PATH, min_similarity: float = 0.6):
+        """
+        Bundled per-kg landfill emission factors with a word index for fuzzy name lookups.
+
+        Every name and alias is normalized and indexed by its last word, the
+        head noun. A fuzzy match must end in the same head noun as an entry
+        name or alias and contain all its other words, so extra descriptive
+        words are fine ("crushed aluminum can") but generic, partial or
+        differently headed names are not ("cup", "plastic", "bag", "coffee").
+        Trailing "with ..."/"of ..." phrases are ignored. Candidates are
+        ranked by character-trigram similarity (Dice coefficient) and the best
+        one scoring at least min_similarity wins. Exact normalized matches
+        skip the index.
+
+        Args:
+            path (str): CSV with name, category, emissions_per_kg and ;-separated aliases
+            min_similarity (float): Minimum trigram similarity (0-1) for a fuzzy match
+        """
+        self.min_similarity = min_similarity
+        self.hits = 0
+        self.misses = 0
+        self.entries: List[Dict] = []
+        self._exact: Dict[str, int] = {}
+        self._keys: List[tuple] = []  # (words, trigrams, entry index)
+        self._index: Dict[str, List[int]] = defaultdict(list)  # head noun -> positions in _keys
+
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                entry = {
+                    "name": row["name"],
+                    "category": row["category"],
+                    "emissions_per_kg": float(row["emissions_per_kg"])
+                }
+                self.entries.append(entry)
+                names = [row["name"]] + [alias for alias in (row.get("aliases") or "").split(";") if alias.strip()]
+                for name in names:
+                    self._add_key(normalize_item_name(name), len(self.entries) - 1)
+
+    def _add_key(self, key: str, entry_index: int) -> None:
+        if not key or key in self._exact:
+            return
+        self._exact[key] = entry_index
+        words = key.split()
+        self._keys.append((frozenset(words), _trigrams(key), entry_index))
+        self._index[words[-1]].append(len(self._keys) - 1)
+
+    def match(self, name: str) -> Optional[Dict]:
+        """Return the best matching entry plus its "score", or None below min_similarity."""
+        key = normalize_item_name(name)
+        if key in self._exact:
+            self.hits += 1
+            return {**self.entries[self._exact[key]], "score": 1.0}
+
+        phrase = _QUALIFIER_PATTERN.sub("", key)
+        words = phrase.split()
+        if not words:
+            self.misses += 1
+            return None
+        query = _trigrams(phrase)
+
+        best_score, best_position = 0.0, None
+        for position in self._index.get(words[-1], ()):
+            key_words, key_trigrams, _ = self._keys[position]
+            if not key_words <= set(words):
+                continue
+            score = 2 * len(query & key_trigrams) / (len(query) + len(key_trigrams))
+            if score > best_score:
+                best_score, best_position = score, position
+
+        if best_position is None or best_score < self.min_similarity:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {**self.entries[self._keys[best_position][2]], "score": best_score}
+
+    def emissions_per_kg(self, name: str) -> Optional[float]:
+        entry = self.match(name)
+        return entry["emissions_per_kg"] if entry is not None else None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,36 @@
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class BackgroundEventLoop:
+    def __init__(self, name: str = "trash-analyzer-loop"):
+        """Long-lived asyncio event loop running on a daemon thread.
+
+        Async clients (aiohttp sessions, AsyncOpenAI) are bound to the loop they
+        are first used on, so keeping one loop alive lets them be shared across
+        frames and callers instead of being rebuilt by every asyncio.run().
+        """
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the background loop and block until it finishes."""
+        if self.in_loop_thread():
+            raise RuntimeError("BackgroundEventLoop.run() called from its own loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def close(self) -> None:
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
@@ -0,0 +1,160 @@
+import os
+from typing import Dict, List, Optional, Tuple
+from cache import LRUCache
+from image_encoding import ImageSource, encode_image_base64, load_frame, crop_frame
+from change_detection import ChangeDetector
+from metrics import timed
+
+ITEMS_FORMAT = "Return as a JSON list. If there are duplicate new items, list each multiple times. Format: {\"items\": [{\"name\": \"item1\", \"mass_kg\": 0.5, \"proper_category\": \"recycle\"}, {\"name\": \"item2\", \"mass_kg\": 0.3, \"proper_category\": \"compost\"}, ...]}"
+
+FULL_FRAME_PROMPT = "I will show you two images of a trash area - one before and one after. Please identify only the NEW waste items that appear in the second image and categorize them as trash, recycle, or compost. " + ITEMS_FORMAT
+
+CHANGED_REGIONS_PROMPT = "I will show you pairs of cropped images of a trash area. Each pair shows one region where something changed: first the region before, then the same region after. Please identify only the NEW waste items that appear in the after crops and categorize them as trash, recycle, or compost. " + ITEMS_FORMAT
+
+OVERVIEW_PROMPT = " The final image is a low-detail overview of the whole area after, for context only."
+
+
+class FramePreparer:
+    def __init__(self, image_max_side: int = 1000, jpeg_quality: int = 85,
+                 change_detector: Optional[ChangeDetector] = None, send_changed_regions: bool = False,
+                 max_regions: int = 4, include_overview: bool = True):
+        """
+        Turns a (before, after) image pair into the user message content for the vision model.
+
+        Holds no clients or threads, so it can be pickled into worker
+        processes. The baseline cache is not pickled; a process pool keeps it
+        warm by installing one preparer per worker with init_worker.
+        """
+        # Longest side and JPEG quality of images sent to the vision model
+        self.image_max_side = image_max_side
+        self.jpeg_quality = jpeg_quality
+        # Encoded baseline ("before") images keyed by path, mtime and size
+        self.baseline_cache = LRUCache(max_entries=8)
+        # Optional local pixel-diff gate; frames it considers unchanged skip all API calls.
+        # Off by default because a frame it wrongly skips loses its new items
+        self.change_detector = change_detector
+        # Send only crops of the changed regions (plus an optional low-detail overview) to the vision model.
+        # Regions come from the gate's detector if there is one, else from a default one, so crops
+        # do not require the skip gate
+        self.send_changed_regions = send_changed_regions
+        self.region_detector = change_detector if change_detector is not None else (
+            ChangeDetector() if send_changed_regions else None
+        )
+        self.max_regions = max_regions
+        self.include_overview = include_overview
+
+    def frame_preparer(self) -> "FramePreparer":
+        """A plain FramePreparer with the same settings, safe to send to a process pool."""
+        return FramePreparer(self.image_max_side, self.jpeg_quality, self.change_detector,
+                             self.send_changed_regions, self.max_regions, self.include_overview)
+
+    def __getstate__(self) -> Dict:
+        state = dict(self.__dict__)
+        del state["baseline_cache"]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self.baseline_cache = LRUCache(max_entries=8)
+
+    def encode_image(self, image: ImageSource) -> str:
+        """Encode an image path, JPEG bytes, or OpenCV frame as a base64 JPEG string."""
+        with timed("encode"):
+            return encode_image_base64(image, max_side=self.image_max_side, quality=self.jpeg_quality)
+
+    def encode_baseline_image(self, image: ImageSource) -> str:
+        """Encode the baseline image, reusing the encoded payload while the file is unchanged.
+
+        Only file paths are memoized; the key includes mtime and size so a
+        replaced baseline is picked up on the next call.
+        """
+        if not isinstance(image, str):
+            return self.encode_image(image)
+
+        stat = os.stat(image)
+        cache_key = (os.path.abspath(image), stat.st_mtime_ns, stat.st_size, self.image_max_side, self.jpeg_quality)
+        encoded_image = self.baseline_cache.get(cache_key)
+        if encoded_image is None:
+            encoded_image = self.encode_image(image)
+            self.baseline_cache.set(cache_key, encoded_image)
+        return encoded_image
+
+    def _image_content(self, encoded_image: str, detail: str = "auto") -> Dict:
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:image/jpeg;base64,{encoded_image}",
+                "detail": detail
+            }
+        }
+
+    def _changed_region_content(self, before_image_path: ImageSource, after_image_path: ImageSource) -> Optional[List[Dict]]:
+        """Build vision content from crops of the changed regions, or None to fall back to full frames."""
+        regions = self.region_detector.changed_regions(before_image_path, after_image_path, max_regions=self.max_regions)
+        if not regions:
+            print("No changed regions found, sending full frames instead of crops")
+            return None
+        # Crops only pay off when they cover a small part of the frame
+        coverage = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+        if coverage > 0.5:
+            print(f"Changed regions cover {coverage:.0%} of the frame, sending full frames instead of crops")
+            return None
+
+        before_frame = load_frame(before_image_path)
+        after_frame = load_frame(after_image_path)
+
+        prompt = CHANGED_REGIONS_PROMPT + (OVERVIEW_PROMPT if self.include_overview else "")
+        content = [{"type": "text", "text": prompt}]
+        for box in regions:
+            content.append(self._image_content(self.encode_image(crop_frame(before_frame, box))))
+            content.append(self._image_content(self.encode_image(crop_frame(after_frame, box))))
+
+        if self.include_overview:
+            overview = encode_image_base64(after_frame, max_side=512, quality=self.jpeg_quality)
+            content.append(self._image_content(overview, detail="low"))
+        return content
+
+    def _vision_content(self, before_image_path: ImageSource, after_image_path: ImageSource) -> Tuple[str, List[Dict]]:
+        """Build the user message content for the vision model, returning (mode, content)."""
+        if self.send_changed_regions:
+            content = self._changed_region_content(before_image_path, after_image_path)
+            if content is not None:
+                return "changed_regions", content
+
+        return "full_frame", [
+            {"type": "text", "text": FULL_FRAME_PROMPT},
+            self._image_content(self.encode_baseline_image(before_image_path)),
+            self._image_content(self.encode_image(after_image_path))
+        ]
+
+    def has_changed(self, before_image_path: ImageSource, after_image_path: ImageSource) -> bool:
+        """Run the change gate; always True when it is disabled."""
+        if self.change_detector is None:
+            return True
+        change_score = self.change_detector.change_score(before_image_path, after_image_path)
+        if change_score < self.change_detector.threshold:
+            print(f"No change detected (score {change_score:.4f}), skipping analysis")
+            return False
+        return True
+
+    def prepare(self, before_image_path: ImageSource, after_image_path: ImageSource) -> Optional[Tuple[str, List[Dict]]]:
+        """Change gate plus encoding in one call: (mode, content), or None if nothing changed."""
+        if not self.has_changed(before_image_path, after_image_path):
+            return None
+        return self._vision_content(before_image_path, after_image_path)
+
+
+# This worker process's preparer, set once by init_worker so its baseline cache
+# lasts across tasks instead of being unpickled fresh with every submit()
+_worker_preparer: Optional[FramePreparer] = None
+
+
+def init_worker(preparer: FramePreparer) -> None:
+    """Process pool initializer: keep one preparer for the life of the worker."""
+    global _worker_preparer
+    _worker_preparer = preparer
+
+
+def prepare_in_worker(before_image_path: ImageSource, after_image_path: ImageSource) -> Optional[Tuple[str, List[Dict]]]:
+    """FramePreparer.prepare on the preparer installed by init_worker."""
+    return _worker_preparer.prepare(before_image_path, after_image_path)
@@ -0,0 +1,185 @@
+import os
+import json
+import sqlite3
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+from report import ReportData
+from emission_factors import normalize_item_name
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "report_history.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    bin_id TEXT,
+    num_trash INTEGER NOT NULL,
+    num_compost INTEGER NOT NULL,
+    num_recycle INTEGER NOT NULL,
+    trash_emissions REAL NOT NULL,
+    compost_in_trash_emissions REAL NOT NULL,
+    recycle_in_trash_emissions REAL NOT NULL,
+    recommendations TEXT
+);
+CREATE INDEX IF NOT EXISTS reports_created_at ON reports (created_at);
+
+CREATE TABLE IF NOT EXISTS items (
+    report_id INTEGER NOT NULL REFERENCES reports (id),
+    created_at REAL NOT NULL,
+    bin_id TEXT,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    mass_kg REAL,
+    landfill_emissions REAL
+);
+CREATE INDEX IF NOT EXISTS items_created_at ON items (created_at, category);
+"""
+
+
+class ReportStore:
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH, skip_empty: bool = True):
+        """
+        Append-only SQLite store of every report and its per-item rows.
+
+        Both tables are indexed by created_at, so time-range queries only
+        touch the rows in the range.
+
+        Args:
+            path (str): SQLite database file (":memory:" for a throwaway store)
+            skip_empty (bool): Don't record reports without any items
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.skip_empty = skip_empty
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def add(self, report_data: ReportData, bin_id: Optional[str] = None) -> Optional[int]:
+        """Append a report and its items; returns the report id (None if skipped).
+
+        bin_id defaults to the report's own binId.
+        """
+        if self.skip_empty and not report_data.items:
+            return None
+        bin_id = bin_id if bin_id is not None else report_data.binId
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO reports (created_at, bin_id, num_trash, num_compost, num_recycle, trash_emissions, "
+                "compost_in_trash_emissions, recycle_in_trash_emissions, recommendations) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (report_data.createdAt, bin_id, report_data.numTrash, report_data.numCompost, report_data.numRecycle,
+                 report_data.trashEmissions, report_data.compostInTrashEmissions, report_data.recycleInTrashEmissions,
+                 json.dumps(report_data.recommendations))
+            )
+            report_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO items (report_id, created_at, bin_id, name, category, mass_kg, landfill_emissions) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(report_id, report_data.createdAt, bin_id, item["item"], item["proper_category"],
+                  item.get("mass_kg"), item.get("landfill_emissions")) for item in report_data.items]
+            )
+        return report_id
+
+    def _range_clause(self, start: Optional[float], end: Optional[float], bin_id: Optional[str]) -> tuple:
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("created_at < ?")
+            params.append(end)
+        if bin_id is not None:
+            clauses.append("bin_id = ?")
+            params.append(bin_id)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def summary(self, start: Optional[float] = None, end: Optional[float] = None, bin_id: Optional[str] = None) -> Dict:
+        """Aggregate counts and emissions for reports with start <= created_at < end (unix seconds)."""
+        where, params = self._range_clause(start, end, bin_id)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS reports, COALESCE(SUM(num_trash), 0) AS numTrash, "
+                "COALESCE(SUM(num_compost), 0) AS numCompost, COALESCE(SUM(num_recycle), 0) AS numRecycle, "
+                "COALESCE(SUM(trash_emissions), 0.0) AS trashEmissions, "
+                "COALESCE(SUM(compost_in_trash_emissions), 0.0) AS compostInTrashEmissions, "
+                "COALESCE(SUM(recycle_in_trash_emissions), 0.0) AS recycleInTrashEmissions "
+                "FROM reports" + where,
+                params
+            ).fetchone()
+        return {"start": start, "end": end, **dict(row)}
+
+    def item_totals(self, start: Optional[float] = None, end: Optional[float] = None,
+                    bin_id: Optional[str] = None, category: Optional[str] = None) -> List[Dict]:
+        """Per item name and category: count, total mass and total emissions in the time range."""
+        where, params = self._range_clause(start, end, bin_id)
+        if category is not None:
+            where += (" AND" if where else " WHERE") + " category = ?"
+            params.append(category)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, category, COUNT(*) AS count, COALESCE(SUM(mass_kg), 0.0) AS mass_kg, "
+                "COALESCE(SUM(landfill_emissions), 0.0) AS landfill_emissions "
+                "FROM items" + where + " GROUP BY name, category ORDER BY count DESC",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def reports(self, start: Optional[float] = None, end: Optional[float] = None,
+                bin_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """The most recent reports in the time range, newest first."""
+        where, params = self._range_clause(start, end, bin_id)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM reports" + where + " ORDER BY created_at DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [{**dict(row), "recommendations": json.loads(row["recommendations"] or "[]")} for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class NewItemsFilter:
+    def __init__(self, build_report: Callable[[List[Dict], List[str]], ReportData],
+                 listeners: List[Callable[[ReportData], None]]):
+        """
+        Forward only the items added since the previous report to listeners.
+
+        For reports that each list the whole bin (every run compared against a
+        fixed baseline image), recording whole reports would count an item
+        again on every run. Items are matched by normalized name and category;
+        the unmatched ones are rebuilt into a report with build_report (e.g.
+        TrashAnalyzer.build_report) and passed on. Empty reports pass nothing
+        on but reset the comparison, so items arriving in an emptied bin count.
+        The first report is forwarded in full.
+        """
+        self.build_report = build_report
+        self.listeners = listeners
+        self._previous_items: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, report_data: ReportData) -> None:
+        keys = [(normalize_item_name(item["item"]), item["proper_category"]) for item in report_data.items]
+        with self._lock:
+            previous = Counter(self._previous_items)
+            new_items = []
+            for key, item in zip(keys, report_data.items):
+                if previous[key] > 0:
+                    previous[key] -= 1
+                else:
+                    new_items.append(item)
+            self._previous_items = Counter(keys)
+
+        if not new_items:
+            return
+        new_report = self.build_report(new_items, report_data.recommendations)
+        new_report.createdAt = report_data.createdAt
+        new_report.binId = report_data.binId
+        for listener in self.listeners:
+            listener(new_report)
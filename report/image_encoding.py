@@ -0,0 +1,79 @@
+import io
+import base64
+from typing import Union
+import cv2
+import numpy as np
+from PIL import Image
+
+# A file path, raw JPEG/PNG bytes, or an OpenCV (BGR) frame
+ImageSource = Union[str, bytes, np.ndarray]
+
+
+def _scaled_size(width: int, height: int, max_side: int) -> tuple:
+    scale = min(1.0, max_side / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def encode_frame(frame: np.ndarray, max_side: int = 1000, quality: int = 85) -> bytes:
+    """Encode an OpenCV frame as JPEG, downscaling so its longest side is at most max_side."""
+    height, width = frame.shape[:2]
+    size = _scaled_size(width, height, max_side)
+    if size != (width, height):
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Could not encode frame as JPEG")
+    return buffer.tobytes()
+
+
+def encode_jpeg(source: ImageSource, max_side: int = 1000, quality: int = 85) -> bytes:
+    """Encode an image as JPEG bytes with its aspect ratio preserved.
+
+    Frames go straight through OpenCV. Files and bytes are opened with PIL in
+    draft mode, so large JPEGs are downscaled by the decoder (1/2, 1/4, 1/8)
+    rather than fully decoded first. JPEG bytes that already fit are passed
+    through without re-encoding.
+    """
+    if isinstance(source, np.ndarray):
+        return encode_frame(source, max_side=max_side, quality=quality)
+
+    is_bytes = isinstance(source, (bytes, bytearray))
+    with Image.open(io.BytesIO(source) if is_bytes else source) as img:
+        if is_bytes and img.format == "JPEG" and max(img.size) <= max_side:
+            return bytes(source)
+
+        if img.format == "JPEG":
+            img.draft("RGB", (max_side, max_side))
+        image = img.convert("RGB") if img.mode != "RGB" else img
+        image.thumbnail((max_side, max_side), Image.BILINEAR)
+
+        with io.BytesIO() as output:
+            image.save(output, format="JPEG", quality=quality)
+            return output.getvalue()
+
+
+def encode_image_base64(source: ImageSource, max_side: int = 1000, quality: int = 85) -> str:
+    """Encode an image as a base64 JPEG string suitable for a data: URL."""
+    return base64.b64encode(encode_jpeg(source, max_side=max_side, quality=quality)).decode('utf-8')
+
+
+def load_frame(source: ImageSource, max_side: int = 2000) -> np.ndarray:
+    """Load an image as an OpenCV (BGR) frame, decoding large JPEGs at reduced resolution."""
+    if isinstance(source, np.ndarray):
+        return source
+
+    is_bytes = isinstance(source, (bytes, bytearray))
+    with Image.open(io.BytesIO(source) if is_bytes else source) as img:
+        if img.format == "JPEG":
+            img.draft("RGB", (max_side, max_side))
+        image = img.convert("RGB")
+    return np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+
+
+def crop_frame(frame: np.ndarray, box: tuple) -> np.ndarray:
+    """Crop a frame to a box given as (x1, y1, x2, y2) fractions of its width and height."""
+    height, width = frame.shape[:2]
+    x1, y1, x2, y2 = box
+    return frame[int(y1 * height):max(int(y2 * height), int(y1 * height) + 1),
+                 int(x1 * width):max(int(x2 * width), int(x1 * width) + 1)]
@@ -0,0 +1,147 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting for a worker."""
+
+
+class Job:
+    def __init__(self, key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "pending"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+        # (event, data) progress events published by streaming jobs, kept for late subscribers
+        self.events: List[Tuple[str, Any]] = []
+        self._events_changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def publish(self, event: str, data: Any) -> None:
+        with self._events_changed:
+            self.events.append((event, data))
+            self._events_changed.notify_all()
+
+    def iter_events(self) -> Iterator[Tuple[str, Any]]:
+        """Yield every event published so far, then new ones as they arrive, until the job finishes.
+
+        A failed job ends with an ("error", {"error": ...}) event.
+        """
+        index = 0
+        while True:
+            with self._events_changed:
+                self._events_changed.wait_for(lambda: len(self.events) > index or self.finished)
+                pending = self.events[index:]
+                finished = self.finished
+            yield from pending
+            index += len(pending)
+            if finished:
+                if self.status == "failed":
+                    yield "error", {"error": self.error}
+                return
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobManager:
+    def __init__(self, max_workers: int = 2, max_pending: int = 8, max_history: int = 100):
+        """Run jobs on a bounded thread pool and keep their results for polling.
+
+        Jobs submitted with a key are coalesced: while a job with that key is
+        pending or running, submitting again returns the existing job instead
+        of starting another one. Streaming jobs publish progress events that
+        any number of subscribers can follow with Job.iter_events().
+        """
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active_by_key: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], key: Optional[str] = None, stream: bool = False) -> Job:
+        """Start fn on the pool, or join the active job with the same key.
+
+        With stream=True, fn is called with the job's publish(event, data) callable.
+        """
+        with self._lock:
+            if key is not None and key in self._active_by_key:
+                return self._active_by_key[key]
+
+            pending = sum(1 for job in self._jobs.values() if job.status == "pending")
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs already pending")
+
+            job = Job(key=key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active_by_key[key] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, fn, stream)
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], stream: bool = False) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(job.publish) if stream else fn()
+            job.status = "done"
+        except Exception as e:
+            print(f"Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if job.key is not None and self._active_by_key.get(job.key) is job:
+                    del self._active_by_key[job.key]
+            with job._events_changed:
+                job._events_changed.notify_all()
+            job.done.set()
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond max_history."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self, key: str) -> Optional[Job]:
+        with self._lock:
+            return self._active_by_key.get(key)
+
+    def latest_finished(self, key: Optional[str] = None) -> Optional[Job]:
+        """Return the most recently finished successful job (optionally with the given key)."""
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job.status == "done" and (key is None or job.key == key):
+                    return job
+        return None
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
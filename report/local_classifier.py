@@ -0,0 +1,92 @@
+import os
+import sys
+from collections import Counter
+from typing import Dict, List, Optional
+from image_encoding import ImageSource, load_frame
+
+# Make camera/ importable for the YOLO detector
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.append(os.path.join(PROJECT_ROOT, "camera"))
+
+# COCO classes the detector knows that we can sort without the vision model:
+# class name -> (item name, proper category, typical mass in kg)
+COCO_WASTE_CLASSES = {
+    "bottle": ("plastic bottle", "recycle", 0.03),
+    "wine glass": ("glass", "recycle", 0.2),
+    "book": ("paper", "recycle", 0.3),
+    "cup": ("disposable cup", "trash", 0.015),
+    "fork": ("plastic fork", "trash", 0.005),
+    "knife": ("plastic knife", "trash", 0.005),
+    "spoon": ("plastic spoon", "trash", 0.005),
+    "toothbrush": ("toothbrush", "trash", 0.02),
+    "banana": ("banana peel", "compost", 0.12),
+    "apple": ("apple core", "compost", 0.15),
+    "orange": ("orange peel", "compost", 0.13),
+    "broccoli": ("broccoli", "compost", 0.1),
+    "carrot": ("carrot", "compost", 0.06),
+    "sandwich": ("sandwich", "compost", 0.15),
+    "hot dog": ("hot dog", "compost", 0.1),
+    "pizza": ("pizza", "compost", 0.1),
+    "donut": ("donut", "compost", 0.06),
+    "cake": ("cake", "compost", 0.1),
+}
+
+
+class LocalClassifier:
+    def __init__(self, min_confidence: float = 0.6, detection_threshold: float = 0.25,
+                 class_map: Optional[Dict[str, tuple]] = None, detector=None):
+        """
+        First-pass classifier that sorts new items with a local YOLO detector.
+
+        Args:
+            min_confidence (float): Every new detection must reach this confidence, otherwise the frame is escalated
+            detection_threshold (float): Detections below this confidence are treated as noise and ignored
+            class_map (dict): Detector class name -> (item name, proper category, mass in kg)
+            detector (ObjectDetector): Detector to use; defaults to the shared one from trial_object_detection
+        """
+        self.min_confidence = min_confidence
+        self.detection_threshold = detection_threshold
+        self.class_map = class_map if class_map is not None else COCO_WASTE_CLASSES
+        self.detector = detector
+
+    def _detect(self, images: List[ImageSource]) -> List[List[Dict]]:
+        """Run the detector over all images in one batch, without drawing annotations."""
+        if self.detector is None:
+            try:
+                from trial_object_detection import get_detector
+            except ImportError as e:
+                raise ImportError("LocalClassifier requires the ultralytics package (pip install ultralytics)") from e
+            self.detector = get_detector()
+
+        results = self.detector.detect_batch([load_frame(image) for image in images],
+                                             confidence_threshold=self.detection_threshold, annotate=False)
+        return [detections for _, detections in results]
+
+    def classify(self, before_image: ImageSource, after_image: ImageSource) -> Optional[List[Dict]]:
+        """
+        Identify new items locally, in the same format as TrashAnalyzer.analyze_images.
+
+        Returns:
+            list: New items, or None when the frame should be escalated to the vision model
+                  (unknown classes, low confidence, or no new items found)
+        """
+        before_detections, after_detections = self._detect([before_image, after_image])
+        before_counts = Counter(det['class'] for det in before_detections)
+        after_counts = Counter(det['class'] for det in after_detections)
+        new_counts = after_counts - before_counts
+        if not new_counts:
+            return None
+
+        for det in after_detections:
+            if det['class'] not in new_counts:
+                continue
+            if det['class'] not in self.class_map or det['confidence'] < self.min_confidence:
+                print(f"Escalating to vision model: {det['class']} ({det['confidence']:.2f})")
+                return None
+
+        items = []
+        for class_name, count in new_counts.items():
+            name, category, mass_kg = self.class_map[class_name]
+            items.extend({"name": name, "mass_kg": mass_kg, "proper_category": category} for _ in range(count))
+        return items
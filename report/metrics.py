@@ -0,0 +1,170 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# Seconds; covers local work (encoding, serial writes) through slow API calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        """Monotonic counter with one value per label set."""
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """Cumulative-bucket histogram with one series per label set."""
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # Label set -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "trash"):
+        """
+        Named counters and histograms rendered in the Prometheus text exposition format.
+
+        Caches registered with register_cache() are read at render time, so
+        their hit and miss counts need no instrumentation at the call sites.
+        """
+        self.prefix = prefix
+        self._metrics: Dict[str, object] = {}
+        self._caches: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        name = f"{self.prefix}_{name}"
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {type(metric).__name__}")
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def register_cache(self, name: str, cache) -> None:
+        """Export a cache's stats() hits and misses; a cache registered under the same name is replaced."""
+        with self._lock:
+            self._caches[name] = cache
+
+    def _render_caches(self) -> List[str]:
+        lines = []
+        for field in ("hits", "misses"):
+            metric = f"{self.prefix}_cache_{field}_total"
+            lines += [f"# HELP {metric} Cache {field} by cache", f"# TYPE {metric} counter"]
+            for name, cache in sorted(self._caches.items()):
+                lines.append(f"{metric}{_format_labels((('cache', name),))} {cache.stats()[field]}")
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        if self._caches:
+            lines += self._render_caches()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram("stage_duration_seconds", "Duration of instrumented operations by stage")
+STAGE_CALLS = REGISTRY.counter("stage_calls_total", "Calls of instrumented operations by stage")
+STAGE_ERRORS = REGISTRY.counter("stage_errors_total", "Failed calls of instrumented operations by stage")
+STAGE_RETRIES = REGISTRY.counter("stage_retries_total", "Retried calls of instrumented operations by stage")
+PIPELINE_STAGE_SECONDS = REGISTRY.histogram("pipeline_stage_duration_seconds", "Duration of analyze_trash graph stages")
+REPORTS = REGISTRY.counter("reports_total", "Completed analyze_trash runs")
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a block as one call of stage; an exception escaping the block counts as an error."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+        STAGE_CALLS.inc(stage=stage)
+
+
+def record_error(stage: str) -> None:
+    """Count an error that was handled without raising (e.g. a non-200 response)."""
+    STAGE_ERRORS.inc(stage=stage)
+
+
+def record_retry(stage: str) -> None:
+    STAGE_RETRIES.inc(stage=stage)
+
+
+def record_pipeline(stage_timings: Dict[str, Dict[str, float]]) -> None:
+    """Record the per-stage timings of one analyze_trash run."""
+    for stage, timing in stage_timings.items():
+        PIPELINE_STAGE_SECONDS.observe(timing["duration_s"], stage=stage)
+    REPORTS.inc()
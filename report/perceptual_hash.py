@@ -0,0 +1,132 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import cv2
+import numpy as np
+from image_encoding import ImageSource
+from change_detection import ChangeDetector, load_grayscale
+
+
+def phash(image: ImageSource, hash_size: int = 16, highfreq_factor: int = 4) -> int:
+    """Perceptual hash: sign of the low-frequency DCT coefficients against their median.
+
+    Sensor noise only moves high frequencies, so consecutive captures of an
+    untouched scene hash within a couple of bits of each other. A small new
+    object (about 1% of the frame) usually moves the default 256-bit hash by
+    10 bits or more, but some move it by only a few, so a near match is not
+    proof that nothing was added.
+    """
+    size = hash_size * highfreq_factor
+    gray = cv2.resize(load_grayscale(image, width=size), (size, size), interpolation=cv2.INTER_AREA)
+    dct = cv2.dct(np.float32(gray))[:hash_size, :hash_size]
+    # The DC term only encodes overall brightness
+    bits = (dct > np.median(dct.flatten()[1:])).flatten()
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class PerceptualHashCache:
+    def __init__(self, max_entries: int = 64, max_distance: int = 3):
+        """
+        LRU cache keyed by tuples of perceptual hashes, matched by Hamming distance.
+
+        A lookup hits the most recently used entry whose hashes are each within
+        max_distance bits of the query's. The default only absorbs sensor
+        noise (about 2 bits). Lookups scan all entries, which is cheap for the
+        few dozen entries this is meant to hold.
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[int, ...], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, *images: ImageSource) -> Tuple[int, ...]:
+        return tuple(phash(image) for image in images)
+
+    def _matches(self, key: Tuple[int, ...], other: Tuple[int, ...]) -> bool:
+        return len(key) == len(other) and all(
+            hamming_distance(a, b) <= self.max_distance for a, b in zip(key, other)
+        )
+
+    def get(self, key: Tuple[int, ...], default: Any = None,
+            accept: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return the value of the most recent near-duplicate key, or default.
+
+        accept, if given, is called with each matching value and can reject it
+        (e.g. after a finer comparison of the images); rejected entries are skipped.
+        """
+        with self._lock:
+            for stored_key in reversed(self._entries):
+                if self._matches(key, stored_key) and (accept is None or accept(self._entries[stored_key])):
+                    self._entries.move_to_end(stored_key)
+                    self.hits += 1
+                    return self._entries[stored_key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Tuple[int, ...], value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+class DuplicateFrameFilter:
+    def __init__(self, max_distance: int = 3, change_detector: Optional[ChangeDetector] = None):
+        """
+        Pass only frames whose perceptual hash differs meaningfully from the last frame kept.
+
+        Comparing against the last kept frame rather than the previous one
+        means a slow drift (e.g. changing daylight) is still let through once
+        it adds up to more than max_distance bits. As in PerceptualHashCache,
+        the default only absorbs sensor noise, and a hash match is confirmed
+        with a pixel diff of grayscale thumbnails before a frame is skipped,
+        since a small new item can move the hash by only a few bits.
+        """
+        self.max_distance = max_distance
+        self.change_detector = change_detector if change_detector is not None else ChangeDetector(threshold=0.0005, pixel_delta=0.3)
+        self.kept = 0
+        self.skipped = 0
+        self._last_kept: Optional[Tuple[int, np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def is_new(self, frame: ImageSource) -> bool:
+        """Return True (and remember the frame) if it is not a near-duplicate of the last kept frame."""
+        thumbnail = load_grayscale(frame, self.change_detector.width)
+        signature = phash(thumbnail)
+        with self._lock:
+            if self._last_kept is not None:
+                last_signature, last_thumbnail = self._last_kept
+                if (hamming_distance(signature, last_signature) <= self.max_distance
+                        and not self.change_detector.has_changed(last_thumbnail, thumbnail)):
+                    self.skipped += 1
+                    return False
+            self._last_kept = signature, thumbnail
+            self.kept += 1
+            return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._last_kept = None
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import Optional
+
+
+class AsyncRateLimiter:
+    def __init__(self, rate_per_second: float = 5.0, burst: int = 10, max_concurrency: Optional[int] = 8):
+        """Token-bucket rate limiter with an optional cap on in-flight requests.
+
+        Tokens refill continuously at rate_per_second up to burst, so a frame's
+        worth of requests can start at once instead of being staggered. The
+        bucket is shared across threads and event loops; the concurrency cap
+        is enforced per event loop.
+
+        Usage:
+            async with limiter:
+                await make_request()
+        """
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _take_token(self) -> float:
+        """Take a token if one is available, otherwise return seconds until the next one."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_per_second)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate_per_second
+
+    def _semaphore(self) -> Optional[asyncio.Semaphore]:
+        if self.max_concurrency is None:
+            return None
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def acquire(self) -> None:
+        semaphore = self._semaphore()
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            if self.rate_per_second:
+                wait = self._take_token()
+                while wait > 0:
+                    await asyncio.sleep(wait)
+                    wait = self._take_token()
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+
+    def release(self) -> None:
+        semaphore = self._semaphore()
+        if semaphore is not None:
+            semaphore.release()
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
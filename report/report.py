@@ -1,3 +1,5 @@
+import time
+
 class ReportData:
     def __init__(self, 
                  numTrash: int, 
@@ -9,7 +11,11 @@ class ReportData:
                  trashEmissions: float,
                  compostInTrashEmissions: float,
                  recycleInTrashEmissions: float,
-                 recommendations: list[str] = None):
+                 recommendations: list[str] = None,
+                 items: list[dict] = None,
+                 createdAt: float = None,
+                 stageTimings: dict = None,
+                 binId: str = None):
         self.numTrash = numTrash
         self.numCompost = numCompost
         self.numRecycle = numRecycle
@@ -20,6 +26,10 @@ class ReportData:
         self.compostInTrashEmissions = compostInTrashEmissions  # Scope 2 emissions from compost in trash
         self.recycleInTrashEmissions = recycleInTrashEmissions  # Scope 2 emissions from recyclables in trash
         self.recommendations = recommendations if recommendations else []
+        self.items = items if items else []  # Per-item rows: item, mass_kg, proper_category, landfill_emissions
+        self.createdAt = createdAt if createdAt is not None else time.time()
+        self.stageTimings = stageTimings if stageTimings else {}  # Stage name -> start_s and duration_s
+        self.binId = binId
 
     def to_dict(self):
         return {
@@ -32,7 +42,11 @@ class ReportData:
             "trashEmissions": self.trashEmissions,
             "compostInTrashEmissions": self.compostInTrashEmissions,
             "recycleInTrashEmissions": self.recycleInTrashEmissions,
-            "recommendations": self.recommendations
+            "recommendations": self.recommendations,
+            "items": self.items,
+            "createdAt": self.createdAt,
+            "stageTimings": self.stageTimings,
+            "binId": self.binId
         }
 
 class Report:
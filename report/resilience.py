@@ -0,0 +1,200 @@
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Optional
+from metrics import REGISTRY, record_retry
+
+CIRCUIT_OPEN = REGISTRY.counter("circuit_open_total", "Calls rejected by an open circuit breaker")
+HEDGED = REGISTRY.counter("hedged_requests_total", "Duplicate requests started to cut tail latency")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+class ProviderError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        """Error response from an HTTP API; retryable for 408, 409, 429 and 5xx."""
+        super().__init__(message)
+        self.status = status
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, connection errors, rate limits and server errors are worth retrying; other 4xx are not."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    # ProviderError.status, openai.APIStatusError.status_code, aiohttp.ClientResponseError.status
+    status = getattr(exc, "status_code", None) or getattr(exc, "status", None)
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    return True
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Fail fast after failure_threshold consecutive failures.
+
+        Once open, calls are rejected for reset_timeout seconds; then a single
+        trial call is let through (half-open) and its outcome closes or
+        reopens the circuit.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return
+        CIRCUIT_OPEN.inc(provider=self.name)
+        raise CircuitOpenError(f"{self.name} circuit is open after {self.failures} consecutive failures")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_running:
+                    print(f"Opening {self.name} circuit after {self.failures} consecutive failures")
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class ResilientCaller:
+    def __init__(self, name: str, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 timeout: float = 30.0, hedge_after: Optional[float] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Retry, timeout, hedging and circuit breaking around calls to one provider.
+
+        Each attempt is bounded by timeout seconds; retryable failures are
+        retried up to max_attempts in total with full-jitter exponential
+        backoff. With hedge_after set, async calls start a duplicate request
+        if the first has not answered after hedge_after seconds and use
+        whichever answers first. Only use hedging for idempotent requests.
+
+        Args:
+            name (str): Provider name used in logs and metrics
+            max_attempts (int): Attempts per call, including the first
+            base_delay (float): Backoff before the first retry; doubles per attempt
+            max_delay (float): Upper bound on a single backoff
+            timeout (float): Seconds allowed per attempt
+            hedge_after (float): Seconds before a hedged duplicate is sent (None disables hedging)
+            breaker (CircuitBreaker): Shared breaker; defaults to one per caller
+        """
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.breaker = breaker if breaker is not None else CircuitBreaker(name)
+
+    def _failed(self, exc: Exception, attempt: int) -> bool:
+        """Update the breaker for a failed attempt; returns whether to retry."""
+        if not is_retryable(exc):
+            # The provider answered; the request itself was bad
+            self.breaker.record_success()
+            return False
+        self.breaker.record_failure()
+        return attempt < self.max_attempts - 1
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _hedged(self, fn: Callable[[], Awaitable[Any]], stage: str) -> Any:
+        first = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done:
+            return first.result()
+
+        HEDGED.inc(stage=stage)
+        pending = {first, asyncio.ensure_future(fn())}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _attempt(self, fn: Callable[[], Awaitable[Any]], stage: str) -> Any:
+        if self.hedge_after is not None:
+            return await asyncio.wait_for(self._hedged(fn, stage), self.timeout)
+        return await asyncio.wait_for(fn(), self.timeout)
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]], stage: str, limiter=None) -> Any:
+        """Await fn() with retries; fn must build a fresh request each time it is called.
+
+        If limiter (an async context manager such as AsyncRateLimiter) is given,
+        every attempt acquires it first, outside the attempt's timeout. A hedged
+        duplicate shares its attempt's slot.
+        """
+        for attempt in range(self.max_attempts):
+            self.breaker.allow()
+            try:
+                if limiter is not None:
+                    async with limiter:
+                        result = await self._attempt(fn, stage)
+                else:
+                    result = await self._attempt(fn, stage)
+            except Exception as e:
+                if not self._failed(e, attempt):
+                    raise
+                delay = self._backoff(attempt)
+                print(f"{stage} failed ({type(e).__name__}: {str(e)[:200]}), retry {attempt + 1} in {delay:.2f}s")
+                record_retry(stage)
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def call(self, fn: Callable[[], Any], stage: str) -> Any:
+        """Blocking counterpart of call_async, without hedging.
+
+        The per-attempt timeout has to be enforced by fn itself (e.g. the
+        client's timeout setting), since a blocking call cannot be cancelled.
+        """
+        for attempt in range(self.max_attempts):
+            self.breaker.allow()
+            try:
+                result = fn()
+            except Exception as e:
+                if not self._failed(e, attempt):
+                    raise
+                delay = self._backoff(attempt)
+                print(f"{stage} failed ({type(e).__name__}: {str(e)[:200]}), retry {attempt + 1} in {delay:.2f}s")
+                record_retry(stage)
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
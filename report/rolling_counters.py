@@ -0,0 +1,92 @@
+import time
+import threading
+from typing import Dict, List, Optional
+from report import ReportData
+
+# Misplaced items are compost and recyclables that ended up in the trash
+MISPLACEMENT_FIELDS = ["numCompost", "numRecycle", "compostInTrashEmissions", "recycleInTrashEmissions"]
+
+
+class RollingWindowCounter:
+    def __init__(self, window_seconds: float, fields: List[str], num_buckets: int = 60):
+        """
+        Sums of several fields over a sliding time window.
+
+        The window is split into num_buckets time buckets kept in a ring. Each
+        update adds to the current bucket and to running totals. When buckets
+        slide out of the window the totals are re-summed from the remaining
+        buckets rather than decremented, so float rounding cannot accumulate
+        (an emptied window reads exactly 0.0); that happens at most once per
+        bucket interval, so updates and reads stay cheap.
+        """
+        self.window_seconds = window_seconds
+        self.fields = fields
+        self.num_buckets = num_buckets
+        self.bucket_seconds = window_seconds / num_buckets
+        self._buckets = [[0.0] * len(fields) for _ in range(num_buckets)]
+        self._totals = [0.0] * len(fields)
+        self._current = None  # Absolute index of the newest bucket
+
+    def _advance(self, now: float) -> None:
+        bucket = int(now // self.bucket_seconds)
+        if self._current is None:
+            self._current = bucket
+            return
+        # Expire every bucket between the previous newest bucket and now (at most the whole ring)
+        expired_buckets = range(self._current + 1, min(bucket, self._current + self.num_buckets) + 1)
+        for expired in expired_buckets:
+            self._buckets[expired % self.num_buckets] = [0.0] * len(self.fields)
+        if expired_buckets:
+            self._totals = [sum(values[i] for values in self._buckets) for i in range(len(self.fields))]
+        self._current = max(self._current, bucket)
+
+    def add(self, values: Dict[str, float], now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self._advance(now)
+        bucket = int(now // self.bucket_seconds)
+        if bucket <= self._current - self.num_buckets:
+            return  # Older than the window
+        bucket_values = self._buckets[bucket % self.num_buckets]
+        for i, field in enumerate(self.fields):
+            value = values.get(field) or 0.0
+            bucket_values[i] += value
+            self._totals[i] += value
+
+    def totals(self, now: Optional[float] = None) -> Dict[str, float]:
+        self._advance(time.time() if now is None else now)
+        return {field: total for field, total in zip(self.fields, self._totals)}
+
+
+class MisplacementAggregator:
+    def __init__(self, windows: Optional[Dict[str, float]] = None, num_buckets: int = 60):
+        """
+        Rolling misplaced-item counts and emissions, fed by each analyze_trash result.
+
+        Args:
+            windows (dict): Window name -> length in seconds (default: hour and day)
+            num_buckets (int): Time resolution of each window
+        """
+        windows = windows if windows is not None else {"hour": 3600, "day": 24 * 3600}
+        self._counters = {
+            name: RollingWindowCounter(seconds, MISPLACEMENT_FIELDS, num_buckets=num_buckets)
+            for name, seconds in windows.items()
+        }
+        self._lock = threading.Lock()
+
+    def update(self, report_data: ReportData) -> None:
+        values = {field: getattr(report_data, field) for field in MISPLACEMENT_FIELDS}
+        with self._lock:
+            for counter in self._counters.values():
+                counter.add(values, now=report_data.createdAt)
+
+    def totals(self, window: Optional[str] = None) -> Dict:
+        """Totals for one window, or {window name: totals} for all windows."""
+        now = time.time()
+        with self._lock:
+            if window is not None:
+                return self._counters[window].totals(now)
+            return {name: counter.totals(now) for name, counter in self._counters.items()}
+
+    @property
+    def windows(self) -> List[str]:
+        return list(self._counters)
@@ -0,0 +1,195 @@
+import os
+import time
+import argparse
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from image_encoding import ImageSource
+from perceptual_hash import DuplicateFrameFilter
+from report import ReportData
+
+
+class CaptureScheduler:
+    def __init__(self, camera, analyzer, interval: float = 5.0, queue_size: int = 4, num_workers: int = 1,
+                 baseline: Optional[ImageSource] = None,
+                 on_report: Optional[Callable[[ReportData], None]] = None,
+                 dedupe_distance: Optional[int] = None):
+        """
+        Capture frames at a fixed interval and analyze them on worker threads.
+
+        Frames go through a bounded queue; when the workers fall behind, the
+        oldest queued frame is dropped so analysis always works on recent data.
+        Each frame is compared against the frame analyzed before it, so the
+        "before" baseline rolls forward as frames are processed. A frame whose
+        analysis fails is not kept as the baseline, so its new items are
+        reported with the next frame instead (unless another worker already
+        paired that frame with the failed one).
+
+        Args:
+            camera (CameraCapture): Source of frames (uses latest_frame())
+            analyzer (TrashAnalyzer): Analyzer used for each frame
+            interval (float): Seconds between captures
+            queue_size (int): Maximum number of frames waiting for analysis
+            num_workers (int): Number of analysis threads
+            baseline: Initial "before" image; defaults to the first captured frame
+            on_report (callable): Called with each ReportData produced
+            dedupe_distance (int): When set, captures within this many perceptual-hash
+                                   bits of the last queued frame (3 absorbs sensor noise)
+                                   and unchanged by a pixel diff are not queued
+        """
+        self.camera = camera
+        self.analyzer = analyzer
+        self.interval = interval
+        self.num_workers = num_workers
+        self.on_report = on_report
+        self.baseline = baseline
+        self._queue = deque(maxlen=queue_size)
+        self._queue_changed = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.frame_filter = DuplicateFrameFilter(dedupe_distance) if dedupe_distance is not None else None
+        self.captured = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.processed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._produce, name="capture-producer", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._work, name=f"analysis-worker-{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._queue_changed:
+            self._queue_changed.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _produce(self) -> None:
+        while not self._stop.is_set():
+            started_at = time.monotonic()
+            frame = self.camera.latest_frame()
+            if frame is not None:
+                if self.frame_filter is None or self.frame_filter.is_new(frame):
+                    self.submit(frame)
+                else:
+                    self.duplicates += 1
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started_at)))
+
+    def submit(self, frame: ImageSource) -> None:
+        """Queue a frame for analysis, dropping the oldest queued frame if the queue is full."""
+        with self._queue_changed:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(frame)
+            self.captured += 1
+            self._queue_changed.notify()
+
+    def _next_pair(self) -> Optional[tuple]:
+        """Take the next frame and pair it with the current baseline, rolling the baseline forward."""
+        with self._queue_changed:
+            while True:
+                self._queue_changed.wait_for(lambda: self._queue or self._stop.is_set())
+                if self._stop.is_set():
+                    return None
+                frame = self._queue.popleft()
+                # Rolled under the lock so concurrent workers chain consecutive frames
+                before, self.baseline = self.baseline, frame
+                if before is not None:
+                    return before, frame
+
+    def _restore_baseline(self, before: ImageSource, frame: ImageSource) -> None:
+        """Roll the baseline back past a frame whose analysis failed."""
+        with self._queue_changed:
+            # A later frame may already have been paired with this one; only undo our own roll
+            if self.baseline is frame:
+                self.baseline = before
+
+    def _work(self) -> None:
+        while True:
+            pair = self._next_pair()
+            if pair is None:
+                return
+            before, after = pair
+            try:
+                report_data = self.analyzer.analyze_trash(before, after)
+            except Exception as e:
+                self.failed += 1
+                self._restore_baseline(before, after)
+                print(f"Error analyzing frame: {str(e)}")
+                continue
+
+            self.processed += 1
+            if self.on_report is not None:
+                self.on_report(report_data)
+
+    def stats(self) -> Dict[str, int]:
+        with self._queue_changed:
+            return {
+                "captured": self.captured,
+                "duplicates": self.duplicates,
+                "dropped": self.dropped,
+                "processed": self.processed,
+                "failed": self.failed,
+                "queued": len(self._queue)
+            }
+
+
+def main():
+    from dotenv import load_dotenv
+    from basic_pipeline import TrashAnalyzer
+    from analyze_trash import CameraCapture
+    from change_detection import ChangeDetector
+
+    parser = argparse.ArgumentParser(description="Capture and analyze frames at a fixed interval")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between captures")
+    parser.add_argument("--queue-size", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--baseline", default=None, help="Initial before image (defaults to the first frame)")
+    parser.add_argument("--dedupe-distance", type=int, default=None,
+                        help="Skip captures within this many perceptual-hash bits of the last queued frame")
+    parser.add_argument("--skip-unchanged", action="store_true",
+                        help="Skip API calls for frames a local pixel diff finds unchanged (may miss small items)")
+    args = parser.parse_args()
+
+    # Load environment variables
+    load_dotenv()
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
+    if not openai_api_key or not perplexity_api_key:
+        print("Error: Missing API keys in .env file")
+        return
+
+    def print_report(report_data: ReportData):
+        print(f"Trash: {report_data.trashNames}, recycle: {report_data.recycleNames}, compost: {report_data.compostNames}")
+
+    camera = CameraCapture()
+    analyzer = TrashAnalyzer(openai_api_key, perplexity_api_key,
+                             change_detector=ChangeDetector() if args.skip_unchanged else None)
+    scheduler = CaptureScheduler(camera, analyzer, interval=args.interval, queue_size=args.queue_size,
+                                 num_workers=args.workers, baseline=args.baseline, on_report=print_report,
+                                 dedupe_distance=args.dedupe_distance)
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(30)
+            print(f"Scheduler: {scheduler.stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        camera.close()
+        analyzer.close()
+
+
+if __name__ == "__main__":
+    main()
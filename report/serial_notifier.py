@@ -0,0 +1,157 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Optional
+import serial
+from metrics import timed, record_retry
+
+DEFAULT_SERIAL_PORT = "/dev/tty.usbmodem1101"
+
+
+class SerialNotifier:
+    def __init__(self, port: Optional[str] = None, baudrate: int = 115200, reconnect_delay: float = 1.0,
+                 coalesce_seconds: float = 2.0, max_queue: int = 16):
+        """
+        Send newline-terminated commands to the bin display over a persistent serial connection.
+
+        send() never blocks: commands are queued and written by a background
+        thread that keeps the port open and reopens it after errors. A command
+        identical to the most recently queued one is dropped; with nothing
+        queued, so is one identical to the command being written or to the
+        last one written within coalesce_seconds. While the port is down, a
+        command that cannot be written is abandoned as soon as a newer one is
+        queued.
+
+        Args:
+            port (str): Serial device; defaults to $SERIAL_PORT, then /dev/tty.usbmodem1101.
+                        An empty string disables the notifier.
+            baudrate (int): Serial baud rate
+            reconnect_delay (float): Seconds to wait before reopening the port after an error
+            coalesce_seconds (float): Window in which a repeated identical command is dropped
+            max_queue (int): Maximum queued commands; the oldest is dropped when full
+        """
+        self.port = port if port is not None else os.getenv("SERIAL_PORT", DEFAULT_SERIAL_PORT)
+        self.baudrate = baudrate
+        self.reconnect_delay = reconnect_delay
+        self.coalesce_seconds = coalesce_seconds
+        self.max_queue = max_queue
+        # Commands not yet taken by the writer thread, oldest first
+        self._pending = deque()
+        self._in_flight: Optional[str] = None
+        self._stopping = False
+        self._changed = threading.Condition()
+        self._last_command: Optional[str] = None
+        self._last_sent_at = 0.0
+        self._serial: Optional[serial.Serial] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._closing = threading.Event()
+        self.sent = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.port)
+
+    def send(self, command: str) -> bool:
+        """Queue a command; returns False if it was coalesced or the notifier is disabled."""
+        if not self.enabled or self._closed:
+            return False
+
+        with self._changed:
+            if self._pending:
+                duplicate = command == self._pending[-1]
+            elif self._in_flight is not None:
+                duplicate = command == self._in_flight
+            else:
+                duplicate = (command == self._last_command
+                             and time.monotonic() - self._last_sent_at < self.coalesce_seconds)
+            if duplicate:
+                self.coalesced += 1
+                return False
+
+            if len(self._pending) >= self.max_queue:
+                self._pending.popleft()
+            self._pending.append(command)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="serial-notifier", daemon=True)
+                self._thread.start()
+            self._changed.notify_all()
+        return True
+
+    def _open(self) -> serial.Serial:
+        if self._serial is None or not self._serial.is_open:
+            self._serial = serial.Serial(self.port, self.baudrate, timeout=1, write_timeout=1)
+        return self._serial
+
+    def _close_port(self) -> None:
+        if self._serial is not None:
+            try:
+                self._serial.close()
+            except serial.SerialException:
+                pass
+            self._serial = None
+
+    def _run(self) -> None:
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    break
+                command = self._pending.popleft()
+                self._in_flight = command
+
+            failures = 0
+            written = False
+            while not self._closing.is_set():
+                if failures:
+                    record_retry("serial_write")
+                try:
+                    with timed("serial_write"):
+                        self._open().write(f"{command}\n".encode())
+                    self.sent += 1
+                    written = True
+                    print(f"Sent command: {command}")
+                    break
+                except (serial.SerialException, OSError) as e:
+                    self.errors += 1
+                    if failures == 0:
+                        print(f"Serial error on {self.port} ({str(e)}), reconnecting every {self.reconnect_delay}s")
+                    failures += 1
+                    self._close_port()
+                    # A newer command supersedes this one
+                    if self._closing.wait(self.reconnect_delay) or self._pending:
+                        break
+
+            with self._changed:
+                self._in_flight = None
+                if written:
+                    self._last_command = command
+                    self._last_sent_at = time.monotonic()
+                self._changed.notify_all()
+
+        self._close_port()
+
+    def flush(self) -> None:
+        """Block until every queued command has been written (or dropped)."""
+        if self._thread is not None:
+            with self._changed:
+                self._changed.wait_for(lambda: not self._pending and self._in_flight is None)
+
+    def close(self) -> None:
+        """Stop the writer thread after pending commands are written, and close the port."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            with self._changed:
+                self._stopping = True
+                self._changed.notify_all()
+            self._thread.join(timeout=5)
+            # Give up on writes still retrying against a dead port
+            self._closing.set()
+            self._thread.join()
+        self._close_port()
@@ -0,0 +1,61 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+# A stage receives the results of the stages it depends on and returns a value or an awaitable
+StageFunction = Callable[[Dict[str, Any]], Any]
+
+
+class StageGraph:
+    def __init__(self):
+        """
+        Small dependency graph of pipeline stages run concurrently on an event loop.
+
+        Every stage starts as soon as all of its dependencies have finished, so
+        independent stages overlap. Synchronous stages should be wrapped with
+        asyncio.to_thread so they don't block the loop. Per-stage start offsets
+        and durations are recorded in timings.
+        """
+        self._stages: Dict[str, tuple] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, fn: StageFunction, deps: Iterable[str] = ()) -> "StageGraph":
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self._stages[name] = (fn, deps)
+        return self
+
+    async def run(self, on_stage_done: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+        """Run every stage and return {stage name: result}; the first failing stage's error is raised."""
+        started_at = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str) -> Any:
+            fn, deps = self._stages[name]
+            dep_results = {dep: await tasks[dep] for dep in deps}
+
+            stage_start = time.perf_counter()
+            result = fn(dep_results)
+            if isinstance(result, Awaitable):
+                result = await result
+            self.timings[name] = {
+                "start_s": stage_start - started_at,
+                "duration_s": time.perf_counter() - stage_start
+            }
+
+            if on_stage_done is not None:
+                on_stage_done(name, result)
+            return result
+
+        # Stages were added after their dependencies, so tasks exist before anything awaits them
+        for name in self._stages:
+            tasks[name] = asyncio.create_task(run_stage(name))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,39 @@
+import pytest
+from emission_factors import EmissionFactorTable
+
+
+@pytest.fixture(scope="module")
+def table():
+    return EmissionFactorTable()
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Banana Peels", "banana peel"),
+    ("crushed aluminum can", "aluminum can"),
+    ("empty plastic water bottles", "plastic bottle"),
+    ("used paper napkin", "paper napkin"),
+    ("Starbucks coffee cup", "coffee cup"),
+    ("paper coffee cup with lid", "coffee cup"),
+    ("glass bottle of beer", "glass bottle"),
+    ("plastic bottle cap", "bottle cap"),
+    ("plastic fork", "plastic utensil"),
+])
+def test_matches_descriptive_names(table, name, expected):
+    assert table.match(name)["name"] == expected
+
+
+@pytest.mark.parametrize("name", [
+    # Short or generic names that share characters or words with an entry
+    "bag", "cup", "water", "plastic", "plastic plate", "coffee", "can", "bottle",
+    "orange juice bottle", "cigarette pack", "smartphone", "",
+])
+def test_rejects_generic_and_unrelated_names(table, name):
+    assert table.match(name) is None
+
+
+def test_stats_count_hits_and_misses():
+    table = EmissionFactorTable()
+    table.match("coffee cup")
+    table.match("cup")
+    assert table.stats()["hits"] == 1
+    assert table.stats()["misses"] == 1
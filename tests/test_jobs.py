@@ -0,0 +1,43 @@
+import threading
+from jobs import JobManager
+
+
+def test_subscribers_share_one_streaming_run():
+    manager = JobManager(max_workers=2)
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def pipeline(publish):
+        runs.append(1)
+        publish("items", ["banana peel"])
+        started.set()
+        release.wait(5)
+        publish("report", {"numCompost": 1})
+        return {"numCompost": 1}
+
+    first = manager.submit(pipeline, key="pipeline", stream=True)
+    assert started.wait(5)
+    # A subscriber joining mid-run gets the same job and replays its earlier events
+    second = manager.submit(pipeline, key="pipeline", stream=True)
+    assert second is first
+    release.set()
+
+    expected = [("items", ["banana peel"]), ("report", {"numCompost": 1})]
+    assert list(first.iter_events()) == expected
+    assert list(second.iter_events()) == expected
+    assert runs == [1]
+    assert first.result == {"numCompost": 1}
+    manager.shutdown()
+
+
+def test_failed_streaming_job_ends_with_an_error_event():
+    manager = JobManager(max_workers=1)
+
+    def pipeline(publish):
+        publish("items", [])
+        raise RuntimeError("camera unavailable")
+
+    job = manager.submit(pipeline, stream=True)
+    assert list(job.iter_events()) == [("items", []), ("error", {"error": "camera unavailable"})]
+    manager.shutdown()
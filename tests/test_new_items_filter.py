@@ -0,0 +1,47 @@
+from report import ReportData
+from history import NewItemsFilter
+from basic_pipeline import TrashAnalyzer
+
+
+def report_of(*names):
+    items = [{"item": name, "mass_kg": 0.1, "proper_category": "compost", "landfill_emissions": 0.06} for name in names]
+    return ReportData(0, len(items), 0, [], [], list(names), 0.0, 0.06 * len(items), 0.0, items=items)
+
+
+def build_report(items, recommendations):
+    return report_of(*(item["item"] for item in items))
+
+
+def recorded_names(reports):
+    return [[item["item"] for item in report_data.items] for report_data in reports]
+
+
+def test_repeated_reports_record_each_item_once():
+    recorded = []
+    new_items = NewItemsFilter(build_report, [recorded.append])
+    new_items(report_of("banana peel", "apple core"))
+    new_items(report_of("banana peel", "apple core"))
+    new_items(report_of("Banana peels", "banana peel", "apple core"))
+    assert recorded_names(recorded) == [["banana peel", "apple core"], ["banana peel"]]
+
+
+def test_item_in_an_emptied_bin_is_recorded_again():
+    recorded = []
+    new_items = NewItemsFilter(build_report, [recorded.append])
+    new_items(report_of("banana peel"))
+    new_items(report_of())
+    new_items(report_of("banana peel"))
+    assert recorded_names(recorded) == [["banana peel"], ["banana peel"]]
+
+
+def test_listeners_see_empty_reports():
+    analyzer = TrashAnalyzer("key", "key", notify_hardware=False, use_local_factors=False)
+    seen = []
+    analyzer.add_report_listener(seen.append)
+    try:
+        # prepared=None is an unchanged frame, as reported by the change gate
+        report_data = analyzer.event_loop.run(analyzer._analyze_prepared("bin", "before.jpg", "after.jpg", None))
+    finally:
+        analyzer.close()
+    assert seen == [report_data]
+    assert report_data.items == []
@@ -0,0 +1,18 @@
+from rolling_counters import RollingWindowCounter
+
+
+def test_totals_follow_the_window():
+    counter = RollingWindowCounter(60, ["emissions"], num_buckets=6)
+    counter.add({"emissions": 1.0}, now=0)
+    counter.add({"emissions": 2.0}, now=30)
+    assert counter.totals(now=59)["emissions"] == 3.0
+    assert counter.totals(now=65)["emissions"] == 2.0
+    assert counter.totals(now=200)["emissions"] == 0.0
+
+
+def test_emptied_window_reads_exactly_zero():
+    counter = RollingWindowCounter(60, ["emissions"], num_buckets=6)
+    for step in range(6):
+        counter.add({"emissions": 0.1}, now=step * 10)
+        counter.add({"emissions": 0.7}, now=step * 10 + 5)
+    assert counter.totals(now=1000)["emissions"] == 0.0
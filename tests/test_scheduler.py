@@ -0,0 +1,47 @@
+import threading
+from scheduler import CaptureScheduler
+
+
+class IdleCamera:
+    def latest_frame(self):
+        return None
+
+
+class FailingAnalyzer:
+    def __init__(self, failing_frames):
+        self.failing_frames = set(failing_frames)
+        self.pairs = []
+        self.done = threading.Event()
+
+    def analyze_trash(self, before, after):
+        self.pairs.append((before, after))
+        if after == "last":
+            self.done.set()
+        if after in self.failing_frames:
+            raise RuntimeError("analysis failed")
+        return (before, after)
+
+
+def run_frames(analyzer, frames):
+    scheduler = CaptureScheduler(IdleCamera(), analyzer, interval=0.01, queue_size=len(frames), baseline="start")
+    for frame in frames:
+        scheduler.submit(frame)
+    scheduler.start()
+    assert analyzer.done.wait(5)
+    scheduler.stop()
+    return scheduler
+
+
+def test_baseline_rolls_forward_after_each_frame():
+    analyzer = FailingAnalyzer([])
+    run_frames(analyzer, ["a", "b", "last"])
+    assert analyzer.pairs == [("start", "a"), ("a", "b"), ("b", "last")]
+
+
+def test_failed_frame_does_not_become_the_baseline():
+    analyzer = FailingAnalyzer(["b"])
+    scheduler = run_frames(analyzer, ["a", "b", "last"])
+    # The next frame is compared against the last frame that was analyzed successfully
+    assert analyzer.pairs == [("start", "a"), ("a", "b"), ("a", "last")]
+    assert scheduler.stats()["failed"] == 1
+    assert scheduler.baseline == "last"
@@ -0,0 +1,72 @@
+import os
+import pty
+import time
+import select
+import pytest
+from serial_notifier import SerialNotifier
+
+
+class SlowPortNotifier(SerialNotifier):
+    """Writes to the real port, but each write takes write_delay seconds."""
+
+    def __init__(self, port, write_delay=0.2, **kwargs):
+        super().__init__(port, **kwargs)
+        self.write_delay = write_delay
+
+    def _open(self):
+        port = super()._open()
+        notifier = self
+
+        class SlowPort:
+            def write(self, data):
+                time.sleep(notifier.write_delay)
+                return port.write(data)
+
+        return SlowPort()
+
+
+@pytest.fixture
+def pty_pair():
+    master, slave = pty.openpty()
+    yield master, os.ttyname(slave)
+    os.close(master)
+    os.close(slave)
+
+
+def read_lines(master, timeout=2.0):
+    data = b""
+    while select.select([master], [], [], timeout)[0]:
+        data += os.read(master, 1024)
+        timeout = 0.2
+    return data.decode().split()
+
+
+def test_latest_command_is_written_when_it_repeats_an_in_flight_one(pty_pair):
+    master, port = pty_pair
+    notifier = SlowPortNotifier(port)
+    try:
+        assert notifier.send("incorrect")
+        time.sleep(0.05)  # "incorrect" is now being written
+        assert notifier.send("correct")
+        assert notifier.send("incorrect")
+        notifier.flush()
+    finally:
+        notifier.close()
+    assert read_lines(master) == ["incorrect", "correct", "incorrect"]
+
+
+def test_repeat_of_the_latest_command_is_coalesced(pty_pair):
+    master, port = pty_pair
+    notifier = SlowPortNotifier(port)
+    try:
+        assert notifier.send("correct")
+        time.sleep(0.05)
+        assert notifier.send("incorrect")
+        assert not notifier.send("incorrect")
+        notifier.flush()
+        # Written within coalesce_seconds with nothing queued
+        assert not notifier.send("incorrect")
+    finally:
+        notifier.close()
+    assert read_lines(master) == ["correct", "incorrect"]
+    assert notifier.coalesced == 2